@@ -0,0 +1,350 @@
+import sqlite3
+import threading
+from datetime import date, timedelta
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from db import versions
+from rollups import WEEK_OF
+
+EPOCH = date(1970, 1, 1)
+
+# Day numbers count from 1970-01-01 (a Thursday); adding 3 makes weeks start
+# on Monday.
+_WEEK_OFFSET = 3
+
+_ROW = np.dtype([
+    ("id", np.int64),
+    ("workout_id", np.int64),
+    ("exercise_id", np.int32),
+    ("day", np.int32),
+    ("weight", np.float64),
+    ("reps", np.int32),
+])
+
+# Week, month and volume are derived once per loaded set so queries only
+# bin and sum.
+_DERIVED = {"week": np.int32, "month": np.int32, "volume": np.float64}
+
+_COLUMNS = ("workout_id", "exercise_id", "day", "weight", "reps", *_DERIVED)
+
+
+class Columns(NamedTuple):
+    workout_id: np.ndarray
+    exercise_id: np.ndarray
+    day: np.ndarray
+    weight: np.ndarray
+    reps: np.ndarray
+    week: np.ndarray
+    month: np.ndarray
+    volume: np.ndarray
+
+    @property
+    def size(self) -> int:
+        return len(self.day)
+
+    def take(self, index) -> "Columns":
+        return Columns(*(column[index] for column in self))
+
+
+_SELECT = """
+    SELECT s.id, s.workout_id, s.exercise_id,
+           CAST(julianday(w.date) - 2440587.5 AS INTEGER) as day,
+           s.weight, s.reps
+    FROM Sets s
+    JOIN Workouts w ON w.id = s.workout_id
+    WHERE s.id > ? AND julianday(w.date) IS NOT NULL
+    ORDER BY s.id
+"""
+
+
+def _dtype(name: str) -> np.dtype:
+    return np.dtype(_DERIVED[name]) if name in _DERIVED else _ROW[name]
+
+
+def _derive(rows: np.ndarray) -> dict[str, np.ndarray]:
+    days = rows["day"].astype(np.int64)
+    return {
+        **{name: rows[name] for name in _ROW.names},
+        "week": (days + _WEEK_OFFSET) // 7,
+        "month": days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64),
+        "volume": rows["weight"] * rows["reps"],
+    }
+
+
+def day_number(value: str) -> int:
+    return (date.fromisoformat(value) - EPOCH).days
+
+
+def day_string(day: int) -> str:
+    return (EPOCH + timedelta(days=int(day))).isoformat()
+
+
+class SetColumns:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._columns = {name: np.empty(0, dtype=_dtype(name)) for name in _COLUMNS}
+        self._size = 0
+        self._max_id = 0
+        self._version = None
+        self._epoch = None
+        self._loads = 0
+        self._appends = 0
+
+    def _append(self, rows: np.ndarray) -> None:
+        needed = self._size + len(rows)
+        values = _derive(rows)
+        for name, column in self._columns.items():
+            if needed > len(column):
+                grown = np.empty(max(needed, 2 * len(column), 1024), dtype=column.dtype)
+                grown[:self._size] = column[:self._size]
+                self._columns[name] = column = grown
+            column[self._size:needed] = values[name]
+        self._size = needed
+        self._max_id = int(rows["id"][-1])
+
+    def _load(self, conn: sqlite3.Connection) -> None:
+        cursor = conn.execute(_SELECT, (self._max_id,))
+        while True:
+            rows = cursor.fetchmany(50000)
+            if not rows:
+                break
+            self._append(np.fromiter((tuple(r) for r in rows), dtype=_ROW, count=len(rows)))
+
+    # Unchanged data costs no query. New sets are appended by id; a rewrite
+    # of existing sets (sets_epoch moved) reloads the snapshot.
+    def refresh(self, conn: sqlite3.Connection) -> Columns:
+        with self._lock:
+            current = versions()
+            if current["version"] != self._version:
+                if current["sets_epoch"] != self._epoch:
+                    self._columns = {name: np.empty(0, dtype=_dtype(name)) for name in _COLUMNS}
+                    self._size = 0
+                    self._max_id = 0
+                    self._loads += 1
+                else:
+                    self._appends += 1
+                self._load(conn)
+                self._version = current["version"]
+                self._epoch = current["sets_epoch"]
+            # Views over the filled prefix; later appends write past it and
+            # a reload swaps in new arrays, so callers keep a stable snapshot.
+            return Columns(*(self._columns[name][:self._size] for name in _COLUMNS))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "sets": self._size,
+                "max_id": self._max_id,
+                "bytes": sum(self._size * _dtype(name).itemsize for name in _COLUMNS),
+                "loads": self._loads,
+                "appends": self._appends,
+            }
+
+
+set_columns = SetColumns()
+
+
+def _filter(
+    rows: Columns,
+    exercise_ids: Optional[np.ndarray],
+    date_from: Optional[str],
+    date_to: Optional[str]
+) -> Columns:
+    if exercise_ids is None and not date_from and not date_to:
+        return rows
+    mask = np.ones(rows.size, dtype=bool)
+    if exercise_ids is not None:
+        mask &= np.isin(rows.exercise_id, exercise_ids)
+    if date_from:
+        mask &= rows.day >= day_number(date_from)
+    if date_to:
+        mask &= rows.day <= day_number(date_to)
+    return rows.take(mask)
+
+
+def _period_start(index: np.ndarray, period: str) -> np.ndarray:
+    if period == "week":
+        return index * 7 - _WEEK_OFFSET
+    return index.astype("datetime64[M]").astype("datetime64[D]").astype(np.int64)
+
+
+def volume_by_period(
+    rows: Columns,
+    period: str,
+    key_of_exercise: np.ndarray,
+    exercise_ids: Optional[np.ndarray] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None
+) -> list[tuple[int, int, int, float]]:
+    # key_of_exercise maps exercise id -> group key (the id itself, or a
+    # muscle group index). Each (period, key) pair gets a dense bin, so the
+    # grouping is two bincounts with no sort.
+    rows = _filter(rows, exercise_ids, date_from, date_to)
+    if not rows.size:
+        return []
+
+    periods = rows.week if period == "week" else rows.month
+    first = int(periods.min())
+    keys = key_of_exercise.astype(np.int32)[rows.exercise_id]
+    width = int(keys.max()) + 1
+    bins = (periods - first).astype(np.int64) * width + keys
+    sets = np.bincount(bins)
+    volume = np.bincount(bins, weights=rows.volume)
+
+    used = np.flatnonzero(sets)
+    starts = _period_start(used // width + first, period)
+    return list(zip(starts.tolist(), (used % width).tolist(), sets[used].tolist(), volume[used].tolist()))
+
+
+def rolling_volume(
+    rows: Columns,
+    window: int,
+    exercise_ids: Optional[np.ndarray] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None
+) -> list[tuple[int, float, float]]:
+    # Daily volume over a dense day range (rest days count as zero) with a
+    # trailing `window`-day mean from a cumulative sum.
+    rows = _filter(rows, exercise_ids, date_from, date_to)
+    if not rows.size:
+        return []
+
+    days = rows.day.astype(np.int64)
+    first = day_number(date_from) if date_from else int(days.min())
+    last = day_number(date_to) if date_to else int(days.max())
+    daily = np.bincount(days - first, weights=rows.volume, minlength=last - first + 1)
+
+    totals = np.concatenate(([0.0], np.cumsum(daily)))
+    ends = np.arange(1, len(daily) + 1)
+    starts = np.maximum(ends - window, 0)
+    rolling = (totals[ends] - totals[starts]) / (ends - starts)
+
+    return list(zip(range(first, last + 1), daily.tolist(), rolling.tolist()))
+
+
+# Estimated one-rep max; a single rep is the lift itself. Brzycki is only
+# defined below 37 reps, sets beyond that do not count.
+E1RM_FORMULAS = {
+    "epley": lambda weight, reps: weight * (1 + reps / 30),
+    "brzycki": lambda weight, reps: np.where(reps < 37, weight * 36 / np.maximum(37 - reps, 1), np.nan),
+}
+
+
+def session_progression(
+    rows: Columns,
+    exercise_id: int,
+    formula: str,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None
+) -> dict[str, np.ndarray]:
+    rows = _filter(rows, np.array([exercise_id]), date_from, date_to)
+    e1rm = np.where(rows.reps == 1, rows.weight, E1RM_FORMULAS[formula](rows.weight, rows.reps.astype(np.float64)))
+    e1rm = np.nan_to_num(e1rm, nan=-1.0)
+
+    # Sessions in date order with each session's best set first.
+    order = np.lexsort((-e1rm, rows.workout_id, rows.day))
+    workout_ids = rows.workout_id[order]
+    starts = np.flatnonzero(np.diff(workout_ids, prepend=-1) != 0) if len(order) else np.empty(0, dtype=np.int64)
+    best = order[starts]
+
+    return {
+        "day": rows.day[best],
+        "workout_id": rows.workout_id[best],
+        "e1rm": np.maximum(e1rm[best], 0),
+        "best_weight": rows.weight[best],
+        "best_reps": rows.reps[best],
+        "volume": np.add.reduceat(rows.volume[order], starts) if len(starts) else np.empty(0),
+        "sets": np.diff(np.append(starts, len(order))),
+    }
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    # Largest-Triangle-Three-Buckets: keeps the first and last points and,
+    # from each bucket in between, the point spanning the largest triangle
+    # with the previously kept point and the next bucket's average.
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    kept = np.empty(threshold, dtype=np.int64)
+    kept[0] = 0
+    kept[-1] = n - 1
+    previous = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        area = np.abs(
+            (x[previous] - avg_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (avg_y - y[previous])
+        )
+        previous = start + int(np.argmax(area))
+        kept[i + 1] = previous
+    return kept
+
+
+_MUSCLE_WEEKLY_SELECT = f"""
+    SELECT {WEEK_OF.format("w.date")} as week, e.muscle_group,
+           COUNT(*) as sets,
+           SUM(s.weight * s.reps) as volume
+    FROM Sets s
+    JOIN Workouts w ON w.id = s.workout_id
+    JOIN Exercises e ON e.id = s.exercise_id
+    WHERE w.date >= ? AND w.date < ?
+    GROUP BY week, e.muscle_group
+"""
+
+
+def week_start(day: date) -> date:
+    return day - timedelta(days=day.weekday())
+
+
+class MuscleVolume:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._weeks: dict[str, dict[str, tuple[int, float]]] = {}
+        self._checked_version = None
+        self._catalog_version = None
+        self._queries = 0
+
+    def _expire(self, conn: sqlite3.Connection, current: dict) -> None:
+        # A muscle group rename moves volume between rows of every week.
+        if current["catalog_version"] != self._catalog_version:
+            self._weeks.clear()
+        elif self._checked_version is not None:
+            for r in conn.execute("SELECT week FROM WeekChanges WHERE version >= ?", (self._checked_version,)):
+                self._weeks.pop(r["week"], None)
+        self._catalog_version = current["catalog_version"]
+        self._checked_version = current["version"]
+
+    # Closed weeks are memoized until a write touches them; the current week
+    # is always recomputed. Whatever is missing comes from one grouped query.
+    def weeks(self, conn: sqlite3.Connection, count: int, today: Optional[date] = None) -> list[tuple[str, dict]]:
+        current_week = week_start(today or date.today())
+        wanted = [(current_week - timedelta(weeks=i)).isoformat() for i in range(count - 1, -1, -1)]
+
+        with self._lock:
+            self._expire(conn, versions())
+            missing = [week for week in wanted if week not in self._weeks]
+            computed: dict[str, dict[str, tuple[int, float]]] = {week: {} for week in missing}
+            if missing:
+                end = (date.fromisoformat(missing[-1]) + timedelta(weeks=1)).isoformat()
+                for r in conn.execute(_MUSCLE_WEEKLY_SELECT, (missing[0], end)):
+                    if r["week"] in computed:
+                        computed[r["week"]][r["muscle_group"]] = (r["sets"], r["volume"])
+                self._queries += 1
+                for week, groups in computed.items():
+                    if week < current_week.isoformat():
+                        self._weeks[week] = groups
+            return [(week, computed[week] if week in computed else self._weeks[week]) for week in wanted]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"memoized_weeks": len(self._weeks), "queries": self._queries}
+
+
+muscle_volume = MuscleVolume()
@@ -0,0 +1,86 @@
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from fastapi.testclient import TestClient
+
+import db
+import main
+from analytics import set_columns
+from bench.history_queries import _fill
+
+WEEKLY_SQL = """
+    SELECT date(w.date, '-' || ((CAST(strftime('%w', w.date) AS INTEGER) + 6) % 7) || ' days') as week,
+           s.exercise_id, COUNT(*) as sets, SUM(s.weight * s.reps) as volume
+    FROM Sets s
+    JOIN Workouts w ON w.id = s.workout_id
+    GROUP BY week, s.exercise_id
+"""
+
+
+def _timed(fn, rounds: int) -> float:
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return round(statistics.median(timings), 2)
+
+
+def _python_loop() -> None:
+    # Row-at-a-time equivalent of the weekly volume endpoint.
+    totals = {}
+    with db.get_conn() as conn:
+        for r in conn.execute("SELECT w.date, s.exercise_id, s.weight, s.reps FROM Sets s JOIN Workouts w ON w.id = s.workout_id"):
+            key = (r["date"], r["exercise_id"])
+            sets, volume = totals.get(key, (0, 0.0))
+            totals[key] = (sets + 1, volume + r["weight"] * r["reps"])
+
+
+def _sql() -> None:
+    with db.get_conn() as conn:
+        conn.execute(WEEKLY_SQL).fetchall()
+
+
+def run(sets: int = 1_000_000, rounds: int = 5) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_PATH = os.path.join(tmp, "bench.db")
+        db.init_db()
+        _fill(workouts=sets // 8, sets_per_workout=8)
+
+        client = TestClient(main.app)
+        started = time.perf_counter()
+        assert client.get("/analytics/volume").status_code == 200
+        cold_ms = round((time.perf_counter() - started) * 1000, 2)
+
+        results = {
+            "sets": set_columns.stats()["sets"],
+            "snapshot_bytes": set_columns.stats()["bytes"],
+            "cold_load_ms": cold_ms,
+        }
+        for name, params in (
+            ("weekly_by_exercise", {"period": "week"}),
+            ("monthly_by_muscle_group", {"period": "month", "group_by": "muscle_group"}),
+        ):
+            results[f"{name}_ms"] = _timed(lambda: client.get("/analytics/volume", params=params), rounds)
+        results["rolling_7d_ms"] = _timed(lambda: client.get("/analytics/rolling", params={"window": 7}), rounds)
+        results["progression_ms"] = _timed(lambda: client.get("/records/1/progression"), rounds)
+        results["progression_200_points_ms"] = _timed(lambda: client.get("/records/1/progression", params={"points": 200}), rounds)
+        started = time.perf_counter()
+        assert client.get("/analytics/muscle-volume", params={"weeks": 104}).status_code == 200
+        results["muscle_volume_104w_cold_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        results["muscle_volume_104w_ms"] = _timed(lambda: client.get("/analytics/muscle-volume", params={"weeks": 104}), rounds)
+        results["sql_group_by_ms"] = _timed(_sql, rounds)
+        results["python_loop_ms"] = _timed(_python_loop, 1)
+        db.close_pool()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sets", type=int, default=1_000_000)
+    args = parser.parse_args()
+    for name, value in run(sets=args.sets).items():
+        print(f"{name:<28} {value}")
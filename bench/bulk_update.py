@@ -0,0 +1,68 @@
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from fastapi.testclient import TestClient
+
+import db
+import main
+from bench.history_queries import _fill
+
+
+def run(set_counts: tuple[int, ...] = (10, 100), rounds: int = 30) -> dict:
+    rnd = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_PATH = os.path.join(tmp, "bench.db")
+        db.init_db()
+        _fill(workouts=200, sets_per_workout=20)
+
+        client = TestClient(main.app)
+        results = {}
+        for sets_per_workout in set_counts:
+            workout = client.post("/workouts/full", json={
+                "date": "2025-01-01",
+                "type": "Strength",
+                "sets": [
+                    {"exercise_id": rnd.randint(1, 31), "weight": rnd.randint(20, 140), "reps": rnd.randint(1, 12)}
+                    for _ in range(sets_per_workout)
+                ],
+            }).json()
+            set_ids = [s["id"] for s in workout["sets"]]
+
+            for route in ("sets", "full"):
+                timings = []
+                queries = set()
+                for _ in range(rounds):
+                    edits = [
+                        {"set_id": set_id, "weight": rnd.randint(20, 160), "reps": rnd.randint(1, 15)}
+                        for set_id in set_ids
+                    ]
+                    started = time.perf_counter()
+                    if route == "sets":
+                        resp = client.put(f"/workouts/{workout['id']}/sets", json=edits)
+                    else:
+                        resp = client.put(f"/workouts/{workout['id']}/full", json={"note": "edited", "sets": edits})
+                    timings.append((time.perf_counter() - started) * 1000)
+                    assert resp.status_code == 200, resp.text
+                    queries.add(int(resp.headers["X-Query-Count"]))
+                assert len(queries) == 1, f"query count varies between edits: {queries}"
+
+                results[f"PUT /workouts/{{id}}/{route} x{sets_per_workout}"] = {
+                    "sets": sets_per_workout,
+                    "p50_ms": round(statistics.median(timings), 2),
+                    "max_ms": round(max(timings), 2),
+                    "queries": queries.pop(),
+                }
+        db.close_pool()
+
+    for route in ("sets", "full"):
+        counts = {r["sets"]: r["queries"] for name, r in results.items() if f"/{route} " in name}
+        assert len(set(counts.values())) == 1, f"PUT /workouts/{{id}}/{route} query count grows with sets: {counts}"
+    return results
+
+
+if __name__ == "__main__":
+    for route, result in run().items():
+        print(route, result)
@@ -0,0 +1,77 @@
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+import httpx
+
+import db
+import main
+from bench.history_queries import _fill
+
+
+async def _inline(fn, *args, **kwargs):
+    return fn(*args, **kwargs)
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def _scenario(duration: float, hammers: int) -> list[float]:
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        stop = time.perf_counter() + duration
+
+        async def hammer(n: int):
+            while time.perf_counter() < stop:
+                await client.get("/records")
+                await client.get(f"/records/{1 + n % 31}")
+
+        async def probe() -> list[float]:
+            latencies = []
+            while time.perf_counter() < stop:
+                started = time.perf_counter()
+                resp = await client.get("/exercises")
+                latencies.append((time.perf_counter() - started) * 1000)
+                assert resp.status_code == 200
+                await asyncio.sleep(0.005)
+            return latencies
+
+        results = await asyncio.gather(probe(), *(hammer(n) for n in range(hammers)))
+    return results[0]
+
+
+def run(duration: float = 3.0, hammers: int = 8, inline: bool = False) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_PATH = os.path.join(tmp, "bench.db")
+        db.init_db()
+        _fill(workouts=2000, sets_per_workout=20)
+
+        original = db.run_db
+        if inline:
+            db.run_db = _inline
+        try:
+            latencies = asyncio.run(_scenario(duration, hammers))
+        finally:
+            db.run_db = original
+            db.close_pool()
+
+    return {
+        "mode": "inline" if inline else "db threads",
+        "samples": len(latencies),
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p99_ms": round(_percentile(latencies, 99), 2),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="GET /exercises latency while /records is hammered")
+    parser.add_argument("--duration", type=float, default=3.0)
+    parser.add_argument("--hammers", type=int, default=8)
+    parser.add_argument("--inline", action="store_true", help="run sqlite on the event loop (pre-executor behaviour)")
+    args = parser.parse_args()
+    print(run(args.duration, args.hammers, args.inline))
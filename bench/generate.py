@@ -0,0 +1,159 @@
+import argparse
+import random
+import sqlite3
+from datetime import date, timedelta
+from typing import NamedTuple
+
+import db
+from records import rebuild_records
+from rollups import rebuild_daily_aggregates
+from search import optimize_search_indexes
+
+# Workout types rotate through a push/pull/legs split; each draws its
+# exercises from these muscle groups.
+SPLIT = {
+    "Push": ("Chest", "Shoulders", "Triceps"),
+    "Pull": ("Back", "Biceps"),
+    "Legs": ("Legs", "Core"),
+}
+
+NOTES = (
+    "felt strong today", "shoulder hurt on the last set", "slept badly, kept it light",
+    "new rep PR", "lower back tight, skipped deadlifts", "deload week", "grip gave out early",
+    "knee felt fine after warmup", "short on time", "great pump",
+)
+
+NAME_WORDS = (
+    "Incline", "Decline", "Seated", "Standing", "Single-Arm", "Cable", "Machine", "Smith",
+    "Paused", "Tempo", "Wide-Grip", "Close-Grip", "Deficit", "Banded",
+)
+
+
+class Shape(NamedTuple):
+    years: float = 2.0
+    sessions_per_week: int = 4
+    exercises_per_workout: int = 5
+    sets_per_exercise: int = 4
+    # Exercise popularity within a muscle group follows 1 / rank ** skew.
+    skew: float = 1.2
+    extra_exercises: int = 0
+    templates: int = 10
+    note_rate: float = 0.15
+    end: str = "2025-12-28"
+    seed: int = 0
+
+
+def _exercises(conn: sqlite3.Connection, shape: Shape, rnd: random.Random) -> dict[str, list[tuple[int, float]]]:
+    existing = [(r["name"], r["muscle_group"]) for r in conn.execute("SELECT name, muscle_group FROM Exercises")]
+    groups = sorted({g for _, g in existing} | {g for split in SPLIT.values() for g in split})
+    conn.executemany(
+        "INSERT OR IGNORE INTO Exercises (name, muscle_group) VALUES (?, ?)",
+        [
+            (f"{rnd.choice(NAME_WORDS)} {rnd.choice(existing)[0]} {i}", rnd.choice(groups))
+            for i in range(shape.extra_exercises)
+        ]
+    )
+
+    by_group: dict[str, list[int]] = {}
+    for r in conn.execute("SELECT id, muscle_group FROM Exercises ORDER BY id"):
+        by_group.setdefault(r["muscle_group"], []).append(r["id"])
+    weighted = {}
+    for group, ids in by_group.items():
+        rnd.shuffle(ids)
+        weighted[group] = [(exercise_id, 1 / (rank + 1) ** shape.skew) for rank, exercise_id in enumerate(ids)]
+    return weighted
+
+
+def _pick(rnd: random.Random, weighted: list[tuple[int, float]], taken: list[int]) -> list[int]:
+    candidates = [(exercise_id, w) for exercise_id, w in weighted if exercise_id not in taken]
+    if not candidates:
+        return []
+    return rnd.choices([e for e, _ in candidates], [w for _, w in candidates])
+
+
+def generate(conn: sqlite3.Connection, shape: Shape = Shape()) -> dict:
+    rnd = random.Random(shape.seed)
+    weighted = _exercises(conn, shape, rnd)
+    # Working weight per exercise, drifting up a little each week.
+    base = {exercise_id: rnd.uniform(15, 120) for group in weighted.values() for exercise_id, _ in group}
+
+    end = date.fromisoformat(shape.end)
+    day = end - timedelta(days=int(shape.years * 365))
+    types = list(SPLIT)
+    session = 0
+    workouts = []
+    sets = []
+    week = 0
+    while day <= end:
+        training_days = sorted(rnd.sample(range(7), min(shape.sessions_per_week, 7)))
+        for offset in training_days:
+            session_day = day + timedelta(days=offset)
+            if session_day > end:
+                break
+            workout_type = types[session % len(types)]
+            session += 1
+            note = rnd.choice(NOTES) if rnd.random() < shape.note_rate else None
+            workouts.append((session_day.isoformat(), workout_type, note))
+
+            groups = [g for g in SPLIT[workout_type] if weighted.get(g)]
+            exercise_ids: list[int] = []
+            for i in range(shape.exercises_per_workout):
+                exercise_ids += _pick(rnd, weighted[groups[i % len(groups)]], exercise_ids)
+            progress = 1 + 0.002 * week
+            set_number = 0
+            for exercise_id in exercise_ids:
+                for _ in range(shape.sets_per_exercise):
+                    set_number += 1
+                    weight = round(base[exercise_id] * progress * rnd.uniform(0.9, 1.05) / 2.5) * 2.5
+                    sets.append((len(workouts), exercise_id, weight, rnd.randint(3, 12), set_number))
+        day += timedelta(weeks=1)
+        week += 1
+
+    conn.executemany("INSERT INTO Workouts (date, type, note) VALUES (?, ?, ?)", workouts)
+    workout_ids = db.inserted_ids(conn, len(workouts))
+    conn.executemany(
+        "INSERT INTO Sets (workout_id, exercise_id, weight, reps, set_number) VALUES (?, ?, ?, ?, ?)",
+        [(workout_ids[index - 1], *rest) for index, *rest in sets]
+    )
+
+    template_ids = []
+    for workout_id in rnd.sample(workout_ids, min(shape.templates, len(workouts))):
+        row = conn.execute("SELECT type, note FROM Workouts WHERE id = ?", (workout_id,)).fetchone()
+        template_id = conn.execute(
+            "INSERT INTO Templates (name, type, note) VALUES (?, ?, ?)",
+            (f"{row['type']} #{workout_id}", row["type"], row["note"])
+        ).lastrowid
+        conn.execute(
+            """INSERT INTO TemplateSets (template_id, exercise_id, weight, reps, set_number)
+               SELECT ?, exercise_id, weight, reps, set_number FROM Sets WHERE workout_id = ?""",
+            (template_id, workout_id)
+        )
+        conn.execute("UPDATE Workouts SET template_id = ? WHERE id = ?", (template_id, workout_id))
+        template_ids.append(template_id)
+
+    rebuild_records(conn)
+    rebuild_daily_aggregates(conn)
+    optimize_search_indexes(conn)
+    return {
+        "workouts": len(workouts),
+        "sets": len(sets),
+        "exercises": sum(len(group) for group in weighted.values()),
+        "templates": len(template_ids),
+        "first_date": workouts[0][0] if workouts else None,
+        "last_date": workouts[-1][0] if workouts else None,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fill a database with a deterministic synthetic training log")
+    parser.add_argument("--db", required=True, help="Path to the SQLite database (created and migrated if needed)")
+    for field, default in Shape._field_defaults.items():
+        parser.add_argument(f"--{field.replace('_', '-')}", type=type(default), default=default)
+    args = parser.parse_args()
+
+    db.DB_PATH = args.db
+    db.init_db()
+    with db.get_conn() as conn:
+        summary = generate(conn, Shape(**{field: getattr(args, field) for field in Shape._fields}))
+    db.close_pool()
+    print(summary)
@@ -0,0 +1,55 @@
+import os
+import random
+import tempfile
+
+from fastapi.testclient import TestClient
+
+import db
+import main
+from records import rebuild_records
+from rollups import rebuild_daily_aggregates
+
+
+def _fill(workouts: int, sets_per_workout: int) -> None:
+    rnd = random.Random(0)
+    with db.get_conn() as conn:
+        exercise_ids = [r["id"] for r in conn.execute("SELECT id FROM Exercises")]
+        for i in range(workouts):
+            workout_id = conn.execute(
+                "INSERT INTO Workouts (date, type) VALUES (?, ?)",
+                (f"2024-{1 + i % 12:02d}-{1 + i % 28:02d}", "Strength")
+            ).lastrowid
+            conn.executemany(
+                """INSERT INTO Sets (workout_id, exercise_id, weight, reps, set_number)
+                   VALUES (?, ?, ?, ?, ?)""",
+                [
+                    (workout_id, rnd.choice(exercise_ids), rnd.randint(20, 140), rnd.randint(1, 12), n + 1)
+                    for n in range(sets_per_workout)
+                ]
+            )
+        rebuild_records(conn)
+        rebuild_daily_aggregates(conn)
+
+
+def run() -> dict[int, int]:
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_PATH = os.path.join(tmp, "bench.db")
+        db.init_db()
+        _fill(workouts=1000, sets_per_workout=5)
+
+        client = TestClient(main.app)
+        counts = {}
+        for limit in (1, 10, 100, 1000):
+            resp = client.get("/workouts/history", params={"limit": limit})
+            assert resp.status_code == 200, resp.text
+            assert len(resp.json()["workouts"]) == limit
+            counts[limit] = int(resp.headers["X-Query-Count"])
+        db.close_pool()
+
+    assert len(set(counts.values())) == 1, f"query count grows with limit: {counts}"
+    return counts
+
+
+if __name__ == "__main__":
+    for limit, count in run().items():
+        print(f"limit={limit:<5} queries={count}")
@@ -0,0 +1,46 @@
+import os
+import tempfile
+
+from fastapi.testclient import TestClient
+
+import db
+import main
+
+# Statements the routes run: the workout and set writes, the
+# ExerciseRecords and daily rollup refresh, the response reads and the data
+# version bump. Triggers fire for every set but add nothing here, and an
+# executemany counts once however many sets it inserts.
+CREATE_WORKOUT_FULL = 16
+DELETE_WORKOUT = 14
+
+
+def _create(client: TestClient, sets: int) -> tuple[int, int]:
+    resp = client.post("/workouts/full", json={
+        "date": "2024-01-01",
+        "type": "Push",
+        "sets": [{"exercise_id": 1 + i % 5, "weight": 50, "reps": 5} for i in range(sets)],
+    })
+    assert resp.status_code == 201, resp.text
+    return resp.json()["id"], int(resp.headers["X-Query-Count"])
+
+
+def run() -> dict[str, int]:
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_PATH = os.path.join(tmp, "bench.db")
+        db.init_db()
+
+        client = TestClient(main.app)
+        counts = {}
+        _, counts["create_1_set"] = _create(client, 1)
+        workout_id, counts["create_20_sets"] = _create(client, 20)
+        counts["delete_20_sets"] = int(client.delete(f"/workouts/{workout_id}").headers["X-Query-Count"])
+        db.close_pool()
+
+    assert counts["create_1_set"] == counts["create_20_sets"] == CREATE_WORKOUT_FULL, counts
+    assert counts["delete_20_sets"] == DELETE_WORKOUT, counts
+    return counts
+
+
+if __name__ == "__main__":
+    for name, count in run().items():
+        print(f"{name:<16} queries={count}")
@@ -0,0 +1,81 @@
+import os
+import tempfile
+from contextlib import contextmanager
+
+from fastapi.testclient import TestClient
+
+import db
+import main
+from bench.history_queries import _fill
+
+HOT_ROUTES = [
+    ("/records", {}),
+    ("/records/3", {}),
+    ("/workouts/history", {"limit": 50}),
+    ("/workouts/history", {"limit": 50, "type": "Strength"}),
+    ("/workouts/history", {"limit": 50, "date_from": "2024-03-01", "date_to": "2024-09-30"}),
+    ("/workouts/5", {}),
+    ("/exercises", {}),
+    ("/exercises", {"muscle_group": "Chest"}),
+]
+
+
+# Collects the SQL text each route runs so it can be explained; counts come
+# from X-Query-Count, since the trace callback also reports trigger bodies.
+@contextmanager
+def _statements():
+    statements = []
+    original = main.get_conn
+
+    @contextmanager
+    def traced_conn():
+        with original() as conn:
+            conn.set_trace_callback(statements.append)
+            try:
+                yield conn
+            finally:
+                conn.set_trace_callback(None)
+
+    main.get_conn = traced_conn
+    try:
+        yield statements
+    finally:
+        main.get_conn = original
+
+
+def run() -> dict[str, list[str]]:
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_PATH = os.path.join(tmp, "bench.db")
+        db.init_db()
+        _fill(workouts=300, sets_per_workout=8)
+
+        client = TestClient(main.app)
+        first_page = client.get("/workouts/history", params={"limit": 5}).json()
+        routes = HOT_ROUTES + [("/workouts/history", {"limit": 50, "cursor": first_page["next_cursor"]})]
+
+        plans = {}
+        sorts = []
+        for path, params in routes:
+            with _statements() as statements:
+                resp = client.get(path, params=params)
+            assert resp.status_code == 200, resp.text
+
+            with db.get_conn() as conn:
+                for sql in statements:
+                    if not sql.lstrip().upper().startswith(("SELECT", "WITH")):
+                        continue
+                    plan = [r["detail"] for r in conn.execute(f"EXPLAIN QUERY PLAN {sql}")]
+                    plans.setdefault(f"{path} {sorted(params)}", []).extend(plan)
+                    if any(line.startswith("USE TEMP B-TREE") for line in plan):
+                        sorts.append(f"{path} {params}: {' '.join(sql.split())[:120]}")
+        db.close_pool()
+
+    assert not sorts, "hot queries sort or group through a temp B-tree:\n" + "\n".join(sorts)
+    return plans
+
+
+if __name__ == "__main__":
+    for route, plan in run().items():
+        print(route)
+        for line in plan:
+            print(f"    {line}")
@@ -0,0 +1,90 @@
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from fastapi.testclient import TestClient
+
+import db
+import main
+from search import optimize_search_indexes
+
+WORDS = (
+    "felt strong tired shoulder knee elbow back hurt sore tight great easy heavy light slow fast "
+    "pump deload warmup stretch cramp grip wrist hip form depth lockout pause tempo sleep stress"
+).split()
+
+LIKE_SQL = """
+    SELECT id, date, type, note FROM Workouts
+    WHERE note LIKE ? AND note LIKE ?
+    LIMIT 20
+"""
+
+
+def _fill_notes(count: int) -> None:
+    rnd = random.Random(0)
+    with db.get_conn() as conn:
+        conn.executemany(
+            "INSERT INTO Workouts (date, type, note) VALUES (?, ?, ?)",
+            (
+                (f"20{15 + i % 10}-{1 + i % 12:02d}-{1 + i % 28:02d}", "Strength", " ".join(rnd.choices(WORDS, k=rnd.randint(4, 16))))
+                for i in range(count)
+            )
+        )
+        # A rare phrase, so the ranked query has a clear top hit.
+        conn.execute("UPDATE Workouts SET note = note || ' rotator cuff twinge' WHERE id = ?", (count // 2,))
+        # The oldest note is among the most relevant for a common query.
+        conn.execute("UPDATE Workouts SET note = 'shoulder hurt, shoulder hurt badly' WHERE id = 1")
+        # Bulk loads merge the index afterwards, as POST /import does.
+        optimize_search_indexes(conn)
+
+
+def _timed(fn, rounds: int) -> float:
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return round(statistics.median(timings), 2)
+
+
+def _like(*words: str) -> None:
+    with db.get_conn() as conn:
+        conn.execute(LIKE_SQL, [f"%{w}%" for w in words]).fetchall()
+
+
+def run(notes: int = 300_000, rounds: int = 20) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_PATH = os.path.join(tmp, "bench.db")
+        db.init_db()
+        _fill_notes(notes)
+
+        client = TestClient(main.app)
+        results = {"notes": notes}
+        for name, words in (("rare", ("rotator", "cuff")), ("common", ("shoulder", "hurt"))):
+            query = " ".join(words)
+            assert client.get("/search", params={"q": query}).json()["results"]
+            results[f"fts_{name}_ms"] = _timed(lambda: client.get("/search", params={"q": query}), rounds)
+            results[f"like_{name}_ms"] = _timed(lambda: _like(*words), max(rounds // 4, 1))
+
+        # Every match is ranked, so age does not hide the best note; a window
+        # trades that away for speed.
+        found = client.get("/search", params={"q": "shoulder hurt", "sources": "workout"}).json()["results"]
+        assert any(r["id"] == 1 for r in found), found[:3]
+        windowed = client.get("/search", params={"q": "shoulder hurt", "sources": "workout", "window": 500}).json()["results"]
+        assert all(r["id"] != 1 for r in windowed)
+        results["fts_common_window_500_ms"] = _timed(
+            lambda: client.get("/search", params={"q": "shoulder hurt", "window": 500}), rounds
+        )
+        db.close_pool()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--notes", type=int, default=300_000)
+    args = parser.parse_args()
+    for name, value in run(notes=args.notes).items():
+        print(f"{name:<26} {value}")
@@ -0,0 +1,96 @@
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from fastapi.testclient import TestClient
+
+import db
+import main
+from catalog import exercise_suggestions
+from records import rebuild_records
+
+WORDS = (
+    "bench press squat front back pull push up row curl incline decline smith cable fly extension "
+    "leg hip thrust lunge split deadlift romanian sumo overhead lateral raise shrug dip chin face"
+).split()
+
+# What the endpoint replaces, done in SQL: a LIKE scan joined to usage.
+LIKE_SQL = """
+    SELECT e.id, e.name, e.muscle_group, COALESCE(r.total_sets, 0) as uses
+    FROM Exercises e
+    LEFT JOIN ExerciseRecords r ON r.exercise_id = e.id
+    WHERE e.name LIKE ? OR e.name LIKE ?
+    ORDER BY uses DESC, e.name
+    LIMIT 10
+"""
+
+
+def _fill(exercises: int, sets: int) -> None:
+    rnd = random.Random(0)
+    with db.get_conn() as conn:
+        conn.executemany(
+            "INSERT INTO Exercises (name, muscle_group) VALUES (?, ?)",
+            [(" ".join(rnd.sample(WORDS, 3)).title() + f" {i}", rnd.choice(["Chest", "Back", "Legs"])) for i in range(exercises)]
+        )
+        ids = [r["id"] for r in conn.execute("SELECT id FROM Exercises")]
+        workout_id = conn.execute("INSERT INTO Workouts (date, type) VALUES ('2024-01-01', 'Strength')").lastrowid
+        conn.executemany(
+            "INSERT INTO Sets (workout_id, exercise_id, weight, reps, set_number) VALUES (?, ?, 50, 5, 1)",
+            [(workout_id, rnd.choice(ids)) for _ in range(sets)]
+        )
+        rebuild_records(conn)
+
+
+def _timed(fn, rounds: int) -> float:
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return round(statistics.median(timings), 3)
+
+
+# Both sides run in-process on a pooled connection, so neither pays for an
+# HTTP round trip the other skips.
+def _suggest(prefix: str) -> None:
+    with db.get_conn() as conn:
+        exercise_suggestions.suggest(conn, prefix, 10)
+
+
+def _like(prefix: str) -> None:
+    with db.get_conn() as conn:
+        conn.execute(LIKE_SQL, (f"{prefix}%", f"% {prefix}%")).fetchall()
+
+
+def run(exercises: int = 5000, sets: int = 200_000, rounds: int = 50) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_PATH = os.path.join(tmp, "bench.db")
+        db.init_db()
+        _fill(exercises, sets)
+
+        client = TestClient(main.app)
+        assert client.get("/exercises/suggest", params={"prefix": "pr"}).json()
+        results = {"exercises": exercises, "index_keys": exercise_suggestions.stats()["keys"]}
+        for prefix in ("p", "pre", "romanian dead"):
+            results[f"suggest_{prefix!r}_ms"] = _timed(lambda: _suggest(prefix), rounds)
+            results[f"like_{prefix!r}_ms"] = _timed(lambda: _like(prefix), rounds)
+        results["full_list_ms"] = _timed(lambda: client.get("/exercises"), rounds)
+
+        # One rename: only that exercise's keys move.
+        started = time.perf_counter()
+        client.patch("/exercises/1", json={"name": "Renamed Bench"})
+        client.get("/exercises/suggest", params={"prefix": "ren"})
+        results["rename_then_suggest_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        db.close_pool()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--exercises", type=int, default=5000)
+    args = parser.parse_args()
+    for name, value in run(exercises=args.exercises).items():
+        print(f"{name:<28} {value}")
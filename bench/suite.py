@@ -0,0 +1,307 @@
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import tempfile
+import time
+from typing import Callable, NamedTuple, Optional
+
+from fastapi.routing import APIRoute
+from fastapi.testclient import TestClient
+
+import db
+import main
+from bench.event_loop import _percentile
+from bench.generate import NOTES, Shape, generate
+
+DEFAULT_ROUNDS = 50
+
+
+class Scenario(NamedTuple):
+    name: str
+    route: str
+    # Runs untimed before each request (creating whatever a write needs)
+    # and returns the request as keyword arguments for TestClient.request.
+    prepare: Callable[["Context"], dict]
+    rounds: Optional[int] = None
+
+
+class Context:
+    def __init__(self, client: TestClient, seed: int):
+        self.client = client
+        self.rnd = random.Random(seed)
+        self.counter = 0
+        with db.get_conn() as conn:
+            self.workout_ids = [r["id"] for r in conn.execute("SELECT id FROM Workouts")]
+            self.exercise_ids = [r["exercise_id"] for r in conn.execute("SELECT exercise_id FROM ExerciseRecords WHERE total_sets > 0")]
+            self.template_ids = [r["id"] for r in conn.execute("SELECT id FROM Templates")]
+            self.set_ids = [r["id"] for r in conn.execute("SELECT id FROM Sets")]
+            self.months = [r["month"] for r in conn.execute("SELECT DISTINCT substr(date, 1, 7) as month FROM Workouts")]
+
+    def unique(self, prefix: str) -> str:
+        self.counter += 1
+        return f"{prefix} {self.counter}"
+
+    def workout(self) -> int:
+        return self.rnd.choice(self.workout_ids)
+
+    def exercise(self) -> int:
+        return self.rnd.choice(self.exercise_ids)
+
+    def template(self) -> int:
+        return self.rnd.choice(self.template_ids)
+
+    def sets(self, count: int) -> list[dict]:
+        return [
+            {"exercise_id": self.exercise(), "weight": self.rnd.randint(20, 140), "reps": self.rnd.randint(3, 12)}
+            for _ in range(count)
+        ]
+
+    def new_workout(self, sets: int = 20) -> dict:
+        return self.client.post("/workouts/full", json={"date": "2025-06-01", "type": "Push", "sets": self.sets(sets)}).json()
+
+    def new_exercise(self) -> int:
+        return self.client.post("/exercises", json={"name": self.unique("Unused"), "muscle_group": "Core"}).json()["id"]
+
+    def new_template(self) -> int:
+        workout = self.new_workout(10)
+        return self.client.post(f"/workouts/{workout['id']}/create-template", params={"template_name": self.unique("Bench")}).json()["id"]
+
+
+def _get(url: str, **params) -> dict:
+    return {"method": "GET", "url": url, "params": params}
+
+
+def _month(ctx: Context) -> dict:
+    month = ctx.rnd.choice(ctx.months)
+    return {"date_from": f"{month}-01", "date_to": f"{month}-31"}
+
+
+def _edit_sets(workout: dict, suffix: str) -> dict:
+    edits = [{"set_id": s["id"], "weight": s["weight"] + 2.5, "reps": s["reps"]} for s in workout["sets"]]
+    body = edits if suffix == "/sets" else {"note": "edited", "sets": edits}
+    return {"method": "PUT", "url": f"/workouts/{workout['id']}{suffix}", "json": body}
+
+
+def _ndjson(ctx: Context) -> str:
+    return "".join(
+        json.dumps({"date": "2025-07-01", "type": "Legs", "sets": [
+            {"exercise": f"Imported {ctx.rnd.randint(1, 5)}", "weight": 100, "reps": 5} for _ in range(8)
+        ]}) + "\n"
+        for _ in range(5)
+    )
+
+
+# Reads first, then writes, then deletes, so reads see the generated log.
+SCENARIOS = [
+    Scenario("root", "GET /", lambda ctx: _get("/")),
+    Scenario("health_db", "GET /health/db", lambda ctx: _get("/health/db")),
+    Scenario("health_cache", "GET /health/cache", lambda ctx: _get("/health/cache")),
+    Scenario("metrics", "GET /metrics", lambda ctx: _get("/metrics")),
+    Scenario("history", "GET /workouts/history", lambda ctx: _get("/workouts/history", limit=50)),
+    Scenario("history_no_stats", "GET /workouts/history", lambda ctx: _get("/workouts/history", limit=50, include_stats=False)),
+    Scenario("history_filtered", "GET /workouts/history", lambda ctx: _get("/workouts/history", type="Push", limit=50, **_month(ctx))),
+    Scenario("history_detailed", "GET /workouts/history/detailed", lambda ctx: _get("/workouts/history/detailed", limit=20)),
+    Scenario("workout", "GET /workouts/{workout_id}", lambda ctx: _get(f"/workouts/{ctx.workout()}")),
+    Scenario("set", "GET /sets/{set_id}", lambda ctx: _get(f"/sets/{ctx.rnd.choice(ctx.set_ids)}")),
+    Scenario("exercises", "GET /exercises", lambda ctx: _get("/exercises")),
+    Scenario("exercise_suggest", "GET /exercises/suggest", lambda ctx: _get("/exercises/suggest", prefix=ctx.rnd.choice(["b", "pr", "incl", "squat"]))),
+    Scenario("templates", "GET /templates", lambda ctx: _get("/templates")),
+    Scenario("template", "GET /templates/{template_id}", lambda ctx: _get(f"/templates/{ctx.template()}")),
+    Scenario("records", "GET /records", lambda ctx: _get("/records")),
+    Scenario("record", "GET /records/{exercise_id}", lambda ctx: _get(f"/records/{ctx.exercise()}")),
+    Scenario("record_progression", "GET /records/{exercise_id}/progression", lambda ctx: _get(f"/records/{ctx.exercise()}/progression", points=200)),
+    Scenario("analytics_volume", "GET /analytics/volume", lambda ctx: _get("/analytics/volume", period="week")),
+    Scenario("analytics_rolling", "GET /analytics/rolling", lambda ctx: _get("/analytics/rolling", window=7)),
+    Scenario("muscle_volume", "GET /analytics/muscle-volume", lambda ctx: _get("/analytics/muscle-volume", weeks=52)),
+    Scenario("search", "GET /search", lambda ctx: _get("/search", q=ctx.rnd.choice(NOTES).split()[0])),
+    Scenario("export_month", "GET /export", lambda ctx: _get("/export", format="ndjson", **_month(ctx))),
+    Scenario("create_workout", "POST /workouts", lambda ctx: {
+        "method": "POST", "url": "/workouts", "json": {"date": "2025-06-02", "type": "Pull"},
+    }),
+    Scenario("create_workout_full", "POST /workouts/full", lambda ctx: {
+        "method": "POST", "url": "/workouts/full", "json": {"date": "2025-06-03", "type": "Push", "sets": ctx.sets(20)},
+    }),
+    Scenario("update_workout", "PATCH /workouts/{workout_id}", lambda ctx: {
+        "method": "PATCH", "url": f"/workouts/{ctx.workout()}", "json": {"note": ctx.unique("edited")},
+    }),
+    Scenario("update_workout_full", "PUT /workouts/{workout_id}/full", lambda ctx: _edit_sets(
+        ctx.client.get(f"/workouts/{ctx.workout()}").json(), "/full"
+    )),
+    Scenario("create_set", "POST /sets", lambda ctx: {
+        "method": "POST", "url": "/sets", "json": {"workout_id": ctx.workout(), **ctx.sets(1)[0]},
+    }),
+    Scenario("create_sets_batch", "POST /workouts/{workout_id}/sets/batch", lambda ctx: {
+        "method": "POST", "url": f"/workouts/{ctx.workout()}/sets/batch", "json": ctx.sets(10),
+    }),
+    Scenario("update_set", "PATCH /sets/{set_id}", lambda ctx: {
+        "method": "PATCH", "url": f"/sets/{ctx.rnd.choice(ctx.set_ids)}", "json": {"reps": ctx.rnd.randint(3, 12)},
+    }),
+    Scenario("bulk_update_sets", "PUT /workouts/{workout_id}/sets", lambda ctx: _edit_sets(
+        ctx.new_workout(40), "/sets"
+    )),
+    Scenario("create_exercise", "POST /exercises", lambda ctx: {
+        "method": "POST", "url": "/exercises", "json": {"name": ctx.unique("Bench Exercise"), "muscle_group": "Chest"},
+    }),
+    Scenario("update_exercise", "PATCH /exercises/{exercise_id}", lambda ctx: {
+        "method": "PATCH", "url": f"/exercises/{ctx.exercise()}", "json": {"note": ctx.unique("cue")},
+    }),
+    Scenario("create_template", "POST /workouts/{workout_id}/create-template", lambda ctx: {
+        "method": "POST", "url": f"/workouts/{ctx.workout()}/create-template", "params": {"template_name": ctx.unique("Template")},
+    }),
+    Scenario("instantiate_template", "POST /templates/{template_id}/create-workout", lambda ctx: {
+        "method": "POST", "url": f"/templates/{ctx.template()}/create-workout", "params": {"date": "2025-06-04"},
+    }),
+    Scenario("import_ndjson", "POST /import", lambda ctx: {
+        "method": "POST", "url": "/import", "content": _ndjson(ctx), "headers": {"Content-Type": "application/x-ndjson"},
+    }),
+    Scenario("rebuild_records", "POST /records/rebuild", lambda ctx: {"method": "POST", "url": "/records/rebuild"}, rounds=5),
+    Scenario("delete_set", "DELETE /sets/{set_id}", lambda ctx: {
+        "method": "DELETE", "url": f"/sets/{ctx.new_workout(1)['sets'][0]['id']}",
+    }),
+    Scenario("delete_workout", "DELETE /workouts/{workout_id}", lambda ctx: {
+        "method": "DELETE", "url": f"/workouts/{ctx.new_workout()['id']}",
+    }),
+    Scenario("delete_template", "DELETE /templates/{template_id}", lambda ctx: {
+        "method": "DELETE", "url": f"/templates/{ctx.new_template()}",
+    }),
+    Scenario("delete_exercise", "DELETE /exercises/{exercise_id}", lambda ctx: {
+        "method": "DELETE", "url": f"/exercises/{ctx.new_exercise()}",
+    }),
+]
+
+
+def _routes() -> set[str]:
+    return {
+        f"{method} {route.path}"
+        for route in main.app.routes
+        if isinstance(route, APIRoute)
+        for method in route.methods - {"HEAD"}
+    }
+
+
+class _QueryCounts(logging.Handler):
+    # Reads the per-request line main.query_timing logs once the body is
+    # sent, so streamed responses are counted in full.
+    def __init__(self):
+        super().__init__()
+        self.counts: list[int] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.counts.append(record.queries)
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _measure(ctx: Context, scenario: Scenario, rounds: int, counts: _QueryCounts) -> dict:
+    timings = []
+    queries = []
+    for _ in range(scenario.rounds or rounds):
+        request = scenario.prepare(ctx)
+        counts.counts.clear()
+        started = time.perf_counter()
+        resp = ctx.client.request(**request)
+        timings.append((time.perf_counter() - started) * 1000)
+        queries.append(sum(counts.counts))
+        if resp.status_code >= 300:
+            raise RuntimeError(f"{scenario.name}: {request['method']} {request['url']} -> {resp.status_code} {resp.text[:200]}")
+    return {
+        "route": scenario.route,
+        "rounds": len(timings),
+        "p50_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(_percentile(timings, 95), 3),
+        "p99_ms": round(_percentile(timings, 99), 3),
+        "max_ms": round(max(timings), 3),
+        "queries": statistics.median(queries),
+        "queries_max": max(queries),
+    }
+
+
+def run(shape: Shape = Shape(), rounds: int = DEFAULT_ROUNDS, only: Optional[list[str]] = None) -> dict:
+    missing = _routes() - {s.route for s in SCENARIOS}
+    if missing:
+        raise RuntimeError(f"routes without a scenario: {', '.join(sorted(missing))}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_PATH = os.path.join(tmp, "bench.db")
+        counts = _QueryCounts()
+        level = main.logger.level
+        main.logger.addHandler(counts)
+        main.logger.setLevel(logging.INFO)
+        try:
+            db.init_db()
+            started = time.perf_counter()
+            with db.get_conn() as conn:
+                data = generate(conn, shape)
+            data["generate_s"] = round(time.perf_counter() - started, 2)
+
+            ctx = Context(TestClient(main.app), shape.seed)
+            scenarios = {}
+            for scenario in SCENARIOS:
+                if only and scenario.name not in only:
+                    continue
+                scenarios[scenario.name] = _measure(ctx, scenario, rounds, counts)
+        finally:
+            db.close_pool()
+            main.logger.removeHandler(counts)
+            main.logger.setLevel(level)
+
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "rounds": rounds,
+            "shape": shape._asdict(),
+            "data": data,
+        },
+        "scenarios": scenarios,
+    }
+
+
+def compare(base: dict, head: dict) -> list[str]:
+    lines = [f"{'scenario':<24} {'p50 ms':>18} {'p95 ms':>18} {'queries':>10}"]
+    for name, new in head["scenarios"].items():
+        old = base["scenarios"].get(name)
+        if old is None:
+            lines.append(f"{name:<24} {'(new)':>18}")
+            continue
+        p50 = f"{old['p50_ms']:.2f}->{new['p50_ms']:.2f} {new['p50_ms'] / max(old['p50_ms'], 1e-9):.2f}x"
+        p95 = f"{old['p95_ms']:.2f}->{new['p95_ms']:.2f} {new['p95_ms'] / max(old['p95_ms'], 1e-9):.2f}x"
+        queries = f"{old['queries']:g}->{new['queries']:g}"
+        lines.append(f"{name:<24} {p50:>18} {p95:>18} {queries:>10}")
+    return lines
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time every API route against a generated training log")
+    parser.add_argument("--out", default="bench-results.json", help="Where to write the JSON results")
+    parser.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS)
+    parser.add_argument("--only", nargs="*", help="Scenario names to run")
+    parser.add_argument("--compare", metavar="BASE_JSON", help="Print the change against an earlier results file")
+    for field, default in Shape._field_defaults.items():
+        parser.add_argument(f"--{field.replace('_', '-')}", type=type(default), default=default)
+    args = parser.parse_args()
+
+    results = run(Shape(**{field: getattr(args, field) for field in Shape._fields}), args.rounds, args.only)
+    with open(args.out, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+    for name, r in results["scenarios"].items():
+        print(f"{name:<24} p50 {r['p50_ms']:>8.2f}  p95 {r['p95_ms']:>8.2f}  p99 {r['p99_ms']:>8.2f} ms  queries {r['queries']:g}")
+    if args.compare:
+        with open(args.compare) as f:
+            print("\n".join(compare(json.load(f), results)))
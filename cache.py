@@ -0,0 +1,134 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+
+from db import on_commit, versions
+
+CACHE_MAX_ENTRIES = int(os.getenv("WORKOUT_CACHE_MAX_ENTRIES", "1024"))
+CACHE_MAX_BYTES = int(os.getenv("WORKOUT_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+CACHE_TTL = float(os.getenv("WORKOUT_CACHE_TTL", "300"))
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int, max_bytes: int, ttl: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[bytes, float, frozenset, int]] = OrderedDict()
+        self._tagged: dict[str, set[str]] = {}
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._generation = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._invalidations = 0
+        self._rejected = 0
+
+    def _drop(self, key: str) -> None:
+        body, _, tags, _ = self._entries.pop(key)
+        self._bytes -= len(body)
+        for tag in tags:
+            keys = self._tagged.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tagged[tag]
+
+    # Pairs this process's invalidation count with the database's data
+    # version, which also moves on writes made by other workers.
+    def generation(self) -> tuple[int, int]:
+        version = versions()["version"]
+        with self._lock:
+            return self._generation, version
+
+    def get(self, key: str) -> Response | None:
+        current = versions()["version"]
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            body, expires, _, version = entry
+            if version != current:
+                self._drop(key)
+                self._invalidations += 1
+                self._misses += 1
+                return None
+            if expires <= time.monotonic():
+                self._drop(key)
+                self._expirations += 1
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+        return Response(content=body, media_type="application/json")
+
+    # `generation` is read before the database was queried: if anything was
+    # invalidated since, the content may predate that write and is not stored.
+    def put(self, key: str, content, tags: Iterable[str], generation: tuple[int, int]) -> Response:
+        body = JSONResponse(content=jsonable_encoder(content)).body
+        local, version = generation
+        with self._lock:
+            if local != self._generation or len(body) > self.max_bytes or self.max_entries <= 0:
+                self._rejected += 1
+            else:
+                if key in self._entries:
+                    self._drop(key)
+                tags = frozenset(tags)
+                self._entries[key] = (body, time.monotonic() + self.ttl, tags, version)
+                self._bytes += len(body)
+                for tag in tags:
+                    self._tagged.setdefault(tag, set()).add(key)
+                while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                    self._drop(next(iter(self._entries)))
+                    self._evictions += 1
+        return Response(content=body, media_type="application/json")
+
+    def invalidate(self, tags: Iterable[str]) -> None:
+        with self._lock:
+            self._generation += 1
+            for tag in set(tags):
+                for key in list(self._tagged.get(tag, ())):
+                    self._drop(key)
+                    self._invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._tagged.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "invalidations": self._invalidations,
+                "rejected": self._rejected,
+            }
+
+
+response_cache = ResponseCache(CACHE_MAX_ENTRIES, CACHE_MAX_BYTES, CACHE_TTL)
+
+
+def invalidate_on_commit(conn, tags: Iterable[str]) -> None:
+    tags = list(tags)
+    if tags:
+        on_commit(conn, lambda: response_cache.invalidate(tags))
@@ -0,0 +1,151 @@
+import bisect
+import heapq
+import re
+import sqlite3
+import threading
+from typing import Iterable, Optional
+
+from db import catalog_version, versions
+
+
+def mark_catalog_changed(conn: sqlite3.Connection) -> None:
+    conn.execute("UPDATE DataVersion SET catalog_version = catalog_version + 1")
+
+
+class ExerciseCatalog:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._exercises: dict[int, dict] = {}
+        self._loads = 0
+
+    def _load(self, conn: sqlite3.Connection) -> dict[int, dict]:
+        version = catalog_version()
+        exercises = {
+            r["id"]: dict(r)
+            for r in conn.execute("SELECT id, name, muscle_group, note FROM Exercises")
+        }
+        # Uncommitted exercise writes on this connection must not outlive
+        # its transaction, so such a load is used once and not kept.
+        if not conn.in_transaction:
+            with self._lock:
+                self._version = version
+                self._exercises = exercises
+                self._loads += 1
+        return exercises
+
+    # The snapshot is reloaded when another connection bumped the catalog
+    # version, and once more if it lacks an id the caller expects (a write
+    # from another process that the version check raced with).
+    def snapshot(self, conn: sqlite3.Connection, expect: Iterable[int] = ()) -> dict[int, dict]:
+        with self._lock:
+            version, exercises = self._version, self._exercises
+        if version != catalog_version():
+            return self._load(conn)
+        if any(exercise_id not in exercises for exercise_id in expect):
+            return self._load(conn)
+        return exercises
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"version": self._version, "exercises": len(self._exercises), "loads": self._loads}
+
+
+exercise_catalog = ExerciseCatalog()
+
+
+# Each word start of a name is a key, so "press" finds "Bench Press" too.
+_WORD_START = re.compile(r"(?:^|(?<=[\s\-/(]))\w", re.UNICODE)
+
+
+def _name_keys(name: str) -> list[str]:
+    folded = name.casefold()
+    return [folded[m.start():] for m in _WORD_START.finditer(folded)]
+
+
+class ExerciseSuggestions:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._source: dict[int, dict] = {}
+        self._keys: list[tuple[str, int]] = []
+        self._folded: dict[int, str] = {}
+        self._usage: dict[int, int] = {}
+        self._usage_version = None
+        self._builds = 0
+        self._updates = 0
+
+    # The index follows the catalog snapshot: a new snapshot is diffed
+    # against the one indexed, and only added, renamed or removed exercises
+    # move their keys in the sorted array.
+    def _sync(self, exercises: dict[int, dict]) -> None:
+        if exercises is self._source:
+            return
+        if not self._keys:
+            self._keys = sorted((key, e["id"]) for e in exercises.values() for key in _name_keys(e["name"]))
+            self._builds += 1
+        else:
+            for exercise_id, old in self._source.items():
+                new = exercises.get(exercise_id)
+                if new is None or new["name"] != old["name"]:
+                    for key in _name_keys(old["name"]):
+                        index = bisect.bisect_left(self._keys, (key, exercise_id))
+                        if index < len(self._keys) and self._keys[index] == (key, exercise_id):
+                            del self._keys[index]
+                    self._updates += 1
+            for exercise_id, new in exercises.items():
+                old = self._source.get(exercise_id)
+                if old is None or new["name"] != old["name"]:
+                    for key in _name_keys(new["name"]):
+                        bisect.insort(self._keys, (key, exercise_id))
+                    self._updates += 1
+        self._source = exercises
+        self._folded = {exercise_id: e["name"].casefold() for exercise_id, e in exercises.items()}
+
+    # Usage is the per-exercise set count ExerciseRecords already maintains,
+    # re-read only after a commit.
+    def _usage_counts(self, conn: sqlite3.Connection) -> dict[int, int]:
+        version = versions()["version"]
+        if version != self._usage_version:
+            self._usage = {
+                r["exercise_id"]: r["total_sets"]
+                for r in conn.execute("SELECT exercise_id, total_sets FROM ExerciseRecords WHERE total_sets > 0")
+            }
+            self._usage_version = version
+        return self._usage
+
+    def suggest(
+        self,
+        conn: sqlite3.Connection,
+        prefix: str,
+        limit: int,
+        muscle_group: Optional[str] = None
+    ) -> list[dict]:
+        exercises = exercise_catalog.snapshot(conn)
+        folded = prefix.strip().casefold()
+        with self._lock:
+            self._sync(exercises)
+            usage = self._usage_counts(conn)
+            names = self._folded
+            start = bisect.bisect_left(self._keys, (folded,))
+            end = bisect.bisect_left(self._keys, (folded + "\U0010ffff",), start)
+            matches = {}
+            for key, exercise_id in self._keys[start:end]:
+                # A match at the start of the name beats one on a later word.
+                matches[exercise_id] = matches.get(exercise_id, False) or key == names[exercise_id]
+
+        candidates = [
+            exercises[exercise_id] for exercise_id in matches
+            if muscle_group is None or exercises[exercise_id]["muscle_group"] == muscle_group
+        ]
+        best = heapq.nsmallest(
+            limit, candidates,
+            key=lambda e: (-usage.get(e["id"], 0), not matches[e["id"]], names[e["id"]])
+        )
+        return [{**e, "uses": usage.get(e["id"], 0)} for e in best]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"keys": len(self._keys), "builds": self._builds, "updates": self._updates}
+
+
+exercise_suggestions = ExerciseSuggestions()
@@ -1,143 +1,369 @@
+import argparse
+import asyncio
+import contextvars
+import functools
+import os
+import queue
 import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
 
+from migrations import migrate, pending
+from rollups import check_daily_aggregates, rebuild_daily_aggregates
+from search import optimize_search_indexes
+
 DB_PATH = "workouts.db"
 
+POOL_SIZE = int(os.getenv("WORKOUT_DB_POOL_SIZE", "8"))
+POOL_TIMEOUT = float(os.getenv("WORKOUT_DB_POOL_TIMEOUT", "5.0"))
+BUSY_TIMEOUT_MS = int(os.getenv("WORKOUT_DB_BUSY_TIMEOUT_MS", "5000"))
+MMAP_SIZE = int(os.getenv("WORKOUT_DB_MMAP_SIZE", str(256 * 1024 * 1024)))
+CACHE_SIZE_KIB = int(os.getenv("WORKOUT_DB_CACHE_SIZE_KIB", "16384"))
+DB_THREADS = int(os.getenv("WORKOUT_DB_THREADS", str(POOL_SIZE)))
 
-def _column_exists(conn: sqlite3.Connection, table: str, column: str) -> bool:
-    rows = conn.execute(f"PRAGMA table_info({table})").fetchall()
-    return any(r[1] == column for r in rows)  # r[1] = name
 
+def init_db():
+    with get_conn() as conn:
+        migrate(conn)
 
-def _add_column_if_missing(conn: sqlite3.Connection, table: str, column: str, col_def: str) -> None:
-    if not _column_exists(conn, table, column):
-        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {col_def}")
 
+class PoolTimeoutError(RuntimeError):
+    pass
 
-def init_db():
-    ddl = """
-    CREATE TABLE IF NOT EXISTS Workouts (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        date TEXT NOT NULL,
-        type TEXT NOT NULL,
-        note TEXT
-    );
-
-    CREATE TABLE IF NOT EXISTS Exercises (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT NOT NULL UNIQUE,
-        muscle_group TEXT NOT NULL,
-        note TEXT
-    );
-
-    CREATE TABLE IF NOT EXISTS Sets (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        workout_id INTEGER NOT NULL,
-        exercise_id INTEGER NOT NULL,
-        weight REAL NOT NULL CHECK(weight >= 0),
-        reps INTEGER NOT NULL CHECK(reps > 0),
-        set_number INTEGER NULL,
-        FOREIGN KEY (workout_id) REFERENCES Workouts(id) ON DELETE CASCADE,
-        FOREIGN KEY (exercise_id) REFERENCES Exercises(id) ON DELETE RESTRICT
-    );
-
-    CREATE INDEX IF NOT EXISTS idx_sets_workout_id ON Sets(workout_id);
-    CREATE INDEX IF NOT EXISTS idx_sets_exercise_id ON Sets(exercise_id);
-
-    CREATE TABLE IF NOT EXISTS Templates (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT NOT NULL,
-        type TEXT NOT NULL,
-        note TEXT
-    );
-
-    CREATE TABLE IF NOT EXISTS TemplateSets (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        template_id INTEGER NOT NULL,
-        exercise_id INTEGER NOT NULL,
-        weight REAL NOT NULL CHECK(weight >= 0),
-        reps INTEGER NOT NULL CHECK(reps > 0),
-        set_number INTEGER NULL,
-        FOREIGN KEY (template_id) REFERENCES Templates(id) ON DELETE CASCADE,
-        FOREIGN KEY (exercise_id) REFERENCES Exercises(id) ON DELETE RESTRICT
-    );
-
-    CREATE INDEX IF NOT EXISTS idx_template_sets_template_id ON TemplateSets(template_id);
-    CREATE INDEX IF NOT EXISTS idx_template_sets_exercise_id ON TemplateSets(exercise_id);
-    """
 
-    with get_conn() as conn:
-        conn.executescript(ddl)
+class _Connection(sqlite3.Connection):
+    # Counts the statements the code runs while a request holds the
+    # connection. SQLite's trace hook cannot: it reports the outer statement
+    # again for every trigger step and foreign key action it fires.
+    stats: "QueryStats | None" = None
 
-        _add_column_if_missing(conn, "Workouts", "note", "TEXT")
-        _add_column_if_missing(conn, "Exercises", "note", "TEXT")
-        _add_column_if_missing(conn, "Workouts", "template_id", "INTEGER")
-        
+    def execute(self, *args):
+        if self.stats is not None:
+            self.stats.queries += 1
+        return super().execute(*args)
+
+    def executemany(self, *args):
+        if self.stats is not None:
+            self.stats.queries += 1
+        return super().executemany(*args)
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, check_same_thread=False, factory=_Connection)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+    conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KIB}")
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+class ConnectionPool:
+    def __init__(self, path: str, size: int, timeout: float):
+        self.path = path
+        self.size = size
+        self.timeout = timeout
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._created = 0
+        self._in_use = 0
+        self._checkouts = 0
+        self._timeouts = 0
+        self._discarded = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._watcher: sqlite3.Connection | None = None
+        self._watch_lock = threading.Lock()
+        self._watch_marker = None
+        self._versions: dict = {}
+
+    def acquire(self) -> sqlite3.Connection:
+        started = time.perf_counter()
         try:
-            conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_workouts_template_id 
-                ON Workouts(template_id)
-            """)
-        except sqlite3.OperationalError:
-            pass  
-
-
-def seed_exercises():
-    default_exercises = [
-        ("Bench Press", "Chest"),
-        ("Incline Dumbbell Press", "Chest"),
-        ("Dumbbell Fly", "Chest"),
-        ("Push-Up", "Chest"),
-        ("Cable Crossover", "Chest"),
-        ("Pull-Up", "Back"),
-        ("Lat Pulldown", "Back"),
-        ("Barbell Row", "Back"),
-        ("Seated Cable Row", "Back"),
-        ("Deadlift", "Back"),
-        ("Back Squat", "Legs"),
-        ("Leg Press", "Legs"),
-        ("Romanian Deadlift", "Legs"),
-        ("Leg Extension", "Legs"),
-        ("Leg Curl", "Legs"),
-        ("Calf Raise", "Legs"),
-        ("Overhead Press", "Shoulders"),
-        ("Dumbbell Lateral Raise", "Shoulders"),
-        ("Front Raise", "Shoulders"),
-        ("Face Pull", "Shoulders"),
-        ("Barbell Curl", "Biceps"),
-        ("Dumbbell Curl", "Biceps"),
-        ("Hammer Curl", "Biceps"),
-        ("Tricep Pushdown", "Triceps"),
-        ("Skull Crushers", "Triceps"),
-        ("Dips", "Triceps"),
-        ("Plank", "Core"),
-        ("Crunches", "Core"),
-        ("Russian Twist", "Core"),
-        ("Hanging Leg Raise", "Core"),
-        ("Burpees", "Full Body"),
-    ]
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_create = self._created < self.size
+                if can_create:
+                    self._created += 1
+            if can_create:
+                try:
+                    conn = _connect(self.path)
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            else:
+                try:
+                    conn = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    with self._lock:
+                        self._timeouts += 1
+                    raise PoolTimeoutError(
+                        f"No database connection available within {self.timeout}s (pool size {self.size})"
+                    )
+
+        waited = time.perf_counter() - started
+        with self._lock:
+            self._in_use += 1
+            self._checkouts += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+        return conn
+
+    def release(self, conn: sqlite3.Connection, discard: bool = False) -> None:
+        with self._lock:
+            self._in_use -= 1
+            if discard or self._closed:
+                self._created -= 1
+                self._discarded += discard
+        if discard or self._closed:
+            conn.close()
+        else:
+            self._idle.put(conn)
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            with self._lock:
+                self._created -= 1
+            conn.close()
+        with self._watch_lock:
+            if self._watcher is not None:
+                self._watcher.close()
+                self._watcher = None
+
+    # PRAGMA data_version on a connection that never writes changes whenever
+    # any other connection commits, so the DataVersion row is only re-read
+    # after a commit and unchanged polls touch no table.
+    def versions(self) -> dict:
+        with self._watch_lock:
+            if self._watcher is None:
+                self._watcher = _connect(self.path)
+                self._watch_marker = None
+            marker = self._watcher.execute("PRAGMA data_version").fetchone()[0]
+            if marker != self._watch_marker:
+                row = self._watcher.execute("SELECT * FROM DataVersion WHERE id = 1").fetchone()
+                self._versions = dict(row)
+                self._watch_marker = marker
+            return self._versions
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "path": self.path,
+                "size": self.size,
+                "timeout": self.timeout,
+                "open": self._created,
+                "in_use": self._in_use,
+                "idle": self._created - self._in_use,
+                "checkouts": self._checkouts,
+                "timeouts": self._timeouts,
+                "discarded": self._discarded,
+                "avg_wait_ms": round(self._wait_total / self._checkouts * 1000, 3) if self._checkouts else 0.0,
+                "max_wait_ms": round(self._wait_max * 1000, 3),
+            }
+
+
+_pool: ConnectionPool | None = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ConnectionPool:
+    global _pool
+    pool = _pool
+    if pool is not None and (pool.path, pool.size, pool.timeout) == (DB_PATH, POOL_SIZE, POOL_TIMEOUT):
+        return pool
+
+    with _pool_lock:
+        if _pool is None or (_pool.path, _pool.size, _pool.timeout) != (DB_PATH, POOL_SIZE, POOL_TIMEOUT):
+            if _pool is not None:
+                _pool.close()
+            _pool = ConnectionPool(DB_PATH, POOL_SIZE, POOL_TIMEOUT)
+        return _pool
+
+
+def configure_pool(size: int | None = None, timeout: float | None = None) -> None:
+    global POOL_SIZE, POOL_TIMEOUT
+    if size is not None:
+        POOL_SIZE = size
+    if timeout is not None:
+        POOL_TIMEOUT = timeout
+    _get_pool()
+
+
+def close_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+def pool_stats() -> dict:
+    return _get_pool().stats()
+
+
+def versions() -> dict:
+    return _get_pool().versions()
+
+
+def data_version() -> tuple[int, int]:
+    current = versions()
+    return current["version"], current["updated_at"]
 
-    with get_conn() as conn:
-        count = conn.execute("SELECT COUNT(*) AS c FROM Exercises").fetchone()["c"]
-        if count > 0:
-            return
 
-        conn.executemany(
-            "INSERT INTO Exercises (name, muscle_group) VALUES (?, ?)",
-            default_exercises
-        )
+def catalog_version() -> int:
+    return versions()["catalog_version"]
+
+
+_commit_hooks: dict[int, list] = {}
+
+
+def on_commit(conn: sqlite3.Connection, fn) -> None:
+    # Runs fn once the connection's current get_conn() block has committed;
+    # dropped on rollback.
+    _commit_hooks.setdefault(id(conn), []).append(fn)
+
+
+def inserted_ids(conn: sqlite3.Connection, count: int) -> list[int]:
+    # Rows inserted by one executemany inside a single write transaction get
+    # consecutive AUTOINCREMENT ids ending at last_insert_rowid().
+    last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+    return list(range(last_id - count + 1, last_id + 1))
+
+
+class QueryStats:
+    __slots__ = ("queries", "db_seconds", "wait_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.wait_seconds = 0.0
+
+
+_query_stats: contextvars.ContextVar[QueryStats | None] = contextvars.ContextVar("query_stats", default=None)
+
+
+@contextmanager
+def track_queries():
+    # Every get_conn() block entered under this context, including those on
+    # the db threads, adds its statements and time to the same QueryStats.
+    stats = QueryStats()
+    token = _query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _query_stats.reset(token)
 
 
 @contextmanager
 def get_conn():
-    conn = sqlite3.connect(DB_PATH)
-    conn.execute("PRAGMA foreign_keys = ON")
-    conn.row_factory = sqlite3.Row
+    pool = _get_pool()
+    stats = _query_stats.get()
+    started = time.perf_counter()
+    conn = pool.acquire()
+    if stats is not None:
+        checked_out = time.perf_counter()
+        stats.wait_seconds += checked_out - started
+        conn.stats = stats
+    discard = False
     try:
         yield conn
+        # Migrations commit their own steps; anything still open here wrote data.
+        if conn.in_transaction:
+            conn.execute(
+                "UPDATE DataVersion SET version = version + 1, updated_at = CAST(strftime('%s', 'now') AS INTEGER)"
+            )
         conn.commit()
+        for fn in _commit_hooks.pop(id(conn), ()):
+            fn()
     except Exception:
-        conn.rollback()
+        try:
+            conn.rollback()
+        except sqlite3.Error:
+            discard = True
         raise
     finally:
-        conn.close()
+        _commit_hooks.pop(id(conn), None)
+        if stats is not None:
+            conn.stats = None
+            stats.db_seconds += time.perf_counter() - checked_out
+        pool.release(conn, discard=discard)
+
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=DB_THREADS, thread_name_prefix="workout-db")
+    return _executor
+
+
+def shutdown_executor() -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
+
+
+async def run_db(fn, *args, **kwargs):
+    # Blocking sqlite work runs on the dedicated db threads so the event loop
+    # keeps serving other requests; the caller's contextvars travel with it.
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(_get_executor(), functools.partial(ctx.run, fn, *args, **kwargs))
+
+
+def db_handler(fn):
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        return await run_db(fn, *args, **kwargs)
+    return wrapper
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Workout database maintenance")
+    parser.add_argument("command", choices=["status", "migrate", "check-rollups", "optimize-search"])
+    parser.add_argument("--db", default=DB_PATH, help="Path to the SQLite database")
+    parser.add_argument("--fix", action="store_true", help="check-rollups: rebuild the rollup from raw sets")
+    args = parser.parse_args()
+
+    DB_PATH = args.db
+    with get_conn() as conn:
+        if args.command == "status":
+            todo = pending(conn)
+            print(f"user_version={conn.execute('PRAGMA user_version').fetchone()[0]}, pending={len(todo)}")
+            for target, name in todo:
+                print(f"  {target}: {name}")
+        elif args.command == "migrate":
+            for target, name in migrate(conn):
+                print(f"applied {target}: {name}")
+        elif args.command == "optimize-search":
+            optimize_search_indexes(conn)
+            print("merged note search indexes")
+        else:
+            mismatched = check_daily_aggregates(conn)
+            print(f"{len(mismatched)} day(s) out of sync")
+            for date, workout_type in mismatched:
+                print(f"  {date} {workout_type}")
+            if args.fix and mismatched:
+                rebuild_daily_aggregates(conn)
+                print("rebuilt DailyAggregates")
+    close_pool()
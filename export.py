@@ -0,0 +1,199 @@
+import asyncio
+import csv
+import io
+import itertools
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from typing import AsyncIterator, Iterator, Optional
+
+from catalog import exercise_catalog
+from db import get_conn, run_db
+
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+# One row per set; a workout without sets is a single row with empty set columns.
+CSV_COLUMNS = [
+    "workout_id", "date", "type", "workout_note", "template_id",
+    "set_id", "exercise", "muscle_group", "set_number", "weight", "reps",
+]
+
+FETCH_ROWS = 1000
+FLUSH_BYTES = 64 * 1024
+
+# Each export holds a pooled connection until its last byte is sent, so a
+# few slow downloads could otherwise starve every other request.
+EXPORT_MAX_CONCURRENT = int(os.getenv("WORKOUT_EXPORT_MAX_CONCURRENT", "2"))
+
+# Only touched on the event loop thread.
+_running = 0
+
+
+def _export_rows(conn: sqlite3.Connection, date_from: Optional[str], date_to: Optional[str]) -> Iterator[sqlite3.Row]:
+    where = "WHERE 1=1"
+    params = []
+
+    if date_from:
+        where += " AND w.date >= ?"
+        params.append(date_from)
+
+    if date_to:
+        where += " AND w.date <= ?"
+        params.append(date_to)
+
+    # Served in order by idx_workouts_date_id and idx_sets_workout_set_number,
+    # so rows come off the cursor without a sort and memory stays flat.
+    cursor = conn.execute(f"""
+        SELECT w.id as workout_id, w.date, w.type, w.note, w.template_id,
+               s.id as set_id, s.exercise_id, s.weight, s.reps, s.set_number
+        FROM Workouts w
+        LEFT JOIN Sets s ON s.workout_id = w.id
+        {where}
+        ORDER BY w.date, w.id, s.set_number, s.id
+    """, params)
+    try:
+        while True:
+            rows = cursor.fetchmany(FETCH_ROWS)
+            if not rows:
+                break
+            yield from rows
+    finally:
+        cursor.close()
+
+
+def _exercise_lookup(conn: sqlite3.Connection):
+    exercises = exercise_catalog.snapshot(conn)
+
+    def lookup(exercise_id: int) -> dict:
+        nonlocal exercises
+        if exercise_id not in exercises:
+            exercises = exercise_catalog.snapshot(conn, expect=[exercise_id])
+        return exercises[exercise_id]
+
+    return lookup
+
+
+def _ndjson_lines(conn: sqlite3.Connection, rows: Iterator[sqlite3.Row]) -> Iterator[str]:
+    exercise = _exercise_lookup(conn)
+    for _, group in itertools.groupby(rows, key=lambda r: r["workout_id"]):
+        group = list(group)
+        first = group[0]
+        workout = {
+            "id": first["workout_id"],
+            "date": first["date"],
+            "type": first["type"],
+            "note": first["note"],
+            "template_id": first["template_id"],
+            "sets": [
+                {
+                    "id": r["set_id"],
+                    "exercise_id": r["exercise_id"],
+                    "exercise": exercise(r["exercise_id"])["name"],
+                    "muscle_group": exercise(r["exercise_id"])["muscle_group"],
+                    "set_number": r["set_number"],
+                    "weight": r["weight"],
+                    "reps": r["reps"],
+                }
+                for r in group
+                if r["set_id"] is not None
+            ],
+        }
+        yield json.dumps(workout, ensure_ascii=False) + "\n"
+
+
+def _csv_lines(conn: sqlite3.Connection, rows: Iterator[sqlite3.Row]) -> Iterator[str]:
+    exercise = _exercise_lookup(conn)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+
+    def line(values) -> str:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow(values)
+        return buffer.getvalue()
+
+    yield line(CSV_COLUMNS)
+    for r in rows:
+        set_exercise = exercise(r["exercise_id"]) if r["set_id"] is not None else None
+        yield line([
+            r["workout_id"], r["date"], r["type"], r["note"], r["template_id"],
+            r["set_id"],
+            set_exercise["name"] if set_exercise else None,
+            set_exercise["muscle_group"] if set_exercise else None,
+            r["set_number"], r["weight"], r["reps"],
+        ])
+
+
+def _export_chunks(
+    format: str,
+    date_from: Optional[str],
+    date_to: Optional[str],
+    compress: bool
+) -> Iterator[bytes]:
+    lines = _ndjson_lines if format == "ndjson" else _csv_lines
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS) if compress else None
+
+    with get_conn() as conn:
+        rows = _export_rows(conn, date_from, date_to)
+        pending = []
+        size = 0
+        try:
+            for text in lines(conn, rows):
+                pending.append(text)
+                size += len(text)
+                if size >= FLUSH_BYTES:
+                    chunk = "".join(pending).encode()
+                    pending, size = [], 0
+                    if compressor:
+                        chunk = compressor.compress(chunk)
+                    if chunk:
+                        yield chunk
+        finally:
+            # A client that disconnects closes this generator mid-stream; the
+            # cursor must be finalized before the connection goes back.
+            rows.close()
+
+        chunk = "".join(pending).encode()
+        if compressor:
+            chunk = compressor.compress(chunk) + compressor.flush()
+        if chunk:
+            yield chunk
+
+
+def exports_running() -> int:
+    return _running
+
+
+async def stream_export(
+    format: str,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    compress: bool = False
+) -> AsyncIterator[bytes]:
+    # Every chunk is produced on the db threads, like any other query. A
+    # cancelled download may leave a step running there, so closing takes
+    # the same lock and is shielded to release the connection regardless.
+    global _running
+    _running += 1
+    chunks = _export_chunks(format, date_from, date_to, compress)
+    lock = threading.Lock()
+
+    def step() -> Optional[bytes]:
+        with lock:
+            return next(chunks, None)
+
+    def close() -> None:
+        with lock:
+            chunks.close()
+
+    try:
+        while True:
+            chunk = await run_db(step)
+            if chunk is None:
+                break
+            yield chunk
+    finally:
+        _running -= 1
+        await asyncio.shield(run_db(close))
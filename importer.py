@@ -0,0 +1,245 @@
+import csv
+import io
+import json
+import math
+import sqlite3
+from typing import Iterator, Optional
+
+from cache import invalidate_on_commit
+from catalog import exercise_catalog, mark_catalog_changed
+from db import get_conn, inserted_ids
+from records import apply_set_changes
+from rollups import refresh_daily_aggregates
+from search import optimize_search_indexes
+
+IMPORT_FORMATS = ("ndjson", "csv")
+DEFAULT_MUSCLE_GROUP = "Other"
+DEFAULT_CHUNK_SETS = 5000
+MAX_REPORTED_ERRORS = 1000
+# Imports at least this large merge the workout note index afterwards; a
+# full merge rewrites the whole index, so smaller ones leave it to FTS5's
+# automerge and `db.py optimize-search`.
+OPTIMIZE_SEARCH_MIN_WORKOUTS = 1000
+
+CSV_REQUIRED_COLUMNS = ("date", "type", "exercise", "weight", "reps")
+
+
+class _Workout:
+    __slots__ = ("line", "date", "type", "note", "sets", "valid")
+
+    def __init__(self, line: int, date: str, type: str, note: Optional[str]):
+        self.line = line
+        self.date = date
+        self.type = type
+        self.note = note
+        self.sets: list[tuple] = []
+        self.valid = True
+
+
+def _text(value) -> Optional[str]:
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+# Spreadsheet cells arrive as text ("8", "8.0"), NDJSON values as numbers.
+def _number(value, integer: bool, minimum: float, field: str, required: bool = True):
+    if isinstance(value, str):
+        value = value.strip() or None
+    if value is None and not required:
+        return None
+    try:
+        if isinstance(value, bool):
+            raise TypeError
+        number = float(value)
+    except (TypeError, ValueError):
+        number = math.nan
+    if not math.isfinite(number) or number < minimum or (integer and not number.is_integer()):
+        kind = "an integer" if integer else "a number"
+        raise ValueError(f"{field} must be {kind} {'>' if integer else '>='} {minimum - integer:g}")
+    return int(number) if integer else number
+
+
+def _parse_set(raw: dict) -> tuple:
+    exercise = _text(raw.get("exercise"))
+    if exercise is None:
+        raise ValueError("exercise name is required")
+    weight = _number(raw.get("weight"), integer=False, minimum=0, field="weight")
+    reps = _number(raw.get("reps"), integer=True, minimum=1, field="reps")
+    set_number = _number(raw.get("set_number"), integer=True, minimum=1, field="set_number", required=False)
+    return exercise, _text(raw.get("muscle_group")), weight, reps, set_number
+
+
+def _new_workout(line: int, raw: dict, note_key: str) -> _Workout:
+    date = _text(raw.get("date"))
+    workout_type = _text(raw.get("type"))
+    if date is None or workout_type is None:
+        raise ValueError("date and type are required")
+    return _Workout(line, date, workout_type, _text(raw.get(note_key)))
+
+
+def _parse_ndjson(text: str, errors: list) -> Iterator[_Workout]:
+    for line, content in enumerate(text.splitlines(), start=1):
+        if not content.strip():
+            continue
+        try:
+            raw = json.loads(content)
+            if not isinstance(raw, dict):
+                raise ValueError("expected a JSON object")
+            workout = _new_workout(line, raw, "note")
+            sets = raw.get("sets") or []
+            if not isinstance(sets, list):
+                raise ValueError("sets must be a list")
+        except ValueError as e:
+            errors.append({"line": line, "error": str(e)})
+            workout = _Workout(line, "", "", None)
+            workout.valid = False
+            yield workout
+            continue
+
+        for index, raw_set in enumerate(sets):
+            try:
+                if not isinstance(raw_set, dict):
+                    raise ValueError("expected a JSON object")
+                workout.sets.append(_parse_set(raw_set))
+            except ValueError as e:
+                errors.append({"line": line, "error": f"sets[{index}]: {e}"})
+                workout.valid = False
+        yield workout
+
+
+# Rows are grouped into workouts by the export's workout_id column, or by
+# (date, type, workout_note) when it is absent, as long as they are adjacent.
+def _parse_csv(text: str, errors: list) -> Iterator[_Workout]:
+    reader = csv.DictReader(io.StringIO(text))
+    missing = [c for c in CSV_REQUIRED_COLUMNS if c not in (reader.fieldnames or [])]
+    if missing:
+        errors.append({"line": 1, "error": f"missing columns: {', '.join(missing)}"})
+        return
+
+    workout = None
+    key = None
+    for row in reader:
+        line = reader.line_num
+        row_key = _text(row.get("workout_id")) or (row.get("date"), row.get("type"), row.get("workout_note"))
+        if workout is None or row_key != key:
+            if workout is not None:
+                yield workout
+            key = row_key
+            try:
+                workout = _new_workout(line, row, "workout_note")
+            except ValueError as e:
+                errors.append({"line": line, "error": str(e)})
+                workout = _Workout(line, "", "", None)
+                workout.valid = False
+
+        # A row without an exercise or numbers is a workout without sets.
+        if not any(_text(row.get(c)) for c in ("exercise", "weight", "reps")):
+            continue
+        try:
+            workout.sets.append(_parse_set(row))
+        except ValueError as e:
+            errors.append({"line": line, "error": str(e)})
+            workout.valid = False
+
+    if workout is not None:
+        yield workout
+
+
+def _chunks(workouts: list[_Workout], chunk_sets: int) -> Iterator[list[_Workout]]:
+    chunk = []
+    size = 0
+    for workout in workouts:
+        chunk.append(workout)
+        size += len(workout.sets) + 1
+        if size >= chunk_sets:
+            yield chunk
+            chunk, size = [], 0
+    if chunk:
+        yield chunk
+
+
+def _create_exercises(conn: sqlite3.Connection, missing: dict[str, str]) -> dict[str, int]:
+    conn.executemany("INSERT OR IGNORE INTO Exercises (name, muscle_group) VALUES (?, ?)", list(missing.items()))
+    names = list(missing)
+    ids = {}
+    for start in range(0, len(names), 500):
+        batch = names[start:start + 500]
+        for r in conn.execute(
+            f"SELECT id, name FROM Exercises WHERE name IN ({', '.join('?' for _ in batch)})", batch
+        ):
+            ids[r["name"]] = r["id"]
+    mark_catalog_changed(conn)
+    invalidate_on_commit(conn, ["exercises"])
+    return ids
+
+
+def _insert_chunk(conn: sqlite3.Connection, chunk: list[_Workout], exercise_ids: dict[str, int]) -> None:
+    conn.executemany(
+        "INSERT INTO Workouts (date, type, note) VALUES (?, ?, ?)",
+        [(w.date, w.type, w.note) for w in chunk]
+    )
+    workout_ids = inserted_ids(conn, len(chunk))
+
+    sets = [
+        (workout_id, exercise_ids[name], weight, reps, set_number)
+        for workout_id, w in zip(workout_ids, chunk)
+        for name, _, weight, reps, set_number in w.sets
+    ]
+    if sets:
+        conn.executemany(
+            """INSERT INTO Sets (workout_id, exercise_id, weight, reps, set_number)
+               VALUES (?, ?, ?, ?, ?)""",
+            sets
+        )
+        apply_set_changes(conn, inserted=[
+            {"id": set_id, "workout_id": s[0], "exercise_id": s[1], "weight": s[2], "reps": s[3]}
+            for set_id, s in zip(inserted_ids(conn, len(sets)), sets)
+        ])
+        invalidate_on_commit(conn, {f"record:{s[1]}" for s in sets})
+
+    refresh_daily_aggregates(conn, {(w.date, w.type) for w in chunk})
+
+
+def import_log(
+    text: str,
+    format: str,
+    dry_run: bool = False,
+    chunk_sets: int = DEFAULT_CHUNK_SETS
+) -> dict:
+    errors: list[dict] = []
+    parse = _parse_ndjson if format == "ndjson" else _parse_csv
+    parsed = list(parse(text, errors))
+    workouts = [w for w in parsed if w.valid]
+
+    with get_conn() as conn:
+        exercise_ids = {e["name"]: e["id"] for e in exercise_catalog.snapshot(conn).values()}
+
+    missing: dict[str, str] = {}
+    for w in workouts:
+        for name, muscle_group, *_ in w.sets:
+            if name not in exercise_ids and name not in missing:
+                missing[name] = muscle_group or DEFAULT_MUSCLE_GROUP
+
+    if not dry_run:
+        if missing:
+            with get_conn() as conn:
+                exercise_ids.update(_create_exercises(conn, missing))
+        # Each chunk commits on its own, so a failure keeps the chunks before it.
+        for chunk in _chunks(workouts, chunk_sets):
+            with get_conn() as conn:
+                _insert_chunk(conn, chunk, exercise_ids)
+        if len(workouts) >= OPTIMIZE_SEARCH_MIN_WORKOUTS:
+            with get_conn() as conn:
+                optimize_search_indexes(conn, ("workout",))
+
+    return {
+        "dry_run": dry_run,
+        "workouts": len(workouts),
+        "sets": sum(len(w.sets) for w in workouts),
+        "exercises_created": sorted(missing),
+        "skipped_workouts": len(parsed) - len(workouts),
+        "error_count": len(errors),
+        "errors": errors[:MAX_REPORTED_ERRORS],
+    }
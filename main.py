@@ -1,12 +1,160 @@
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel, constr, Field
+from starlette.routing import BaseRoute, Match
 from typing import Optional
+from email.utils import formatdate, parsedate_to_datetime
+import base64
+import binascii
+import gzip
+import json
+import logging
+import os
+import re
 import sqlite3
-from db import init_db, seed_exercises, get_conn
+import time
+import numpy as np
+from analytics import (
+    E1RM_FORMULAS, day_number, day_string, lttb, muscle_volume, rolling_volume, session_progression, set_columns,
+    volume_by_period
+)
+from cache import invalidate_on_commit, response_cache
+from catalog import exercise_catalog, exercise_suggestions, mark_catalog_changed
+from db import (
+    init_db, get_conn, close_pool, pool_stats, data_version, db_handler, inserted_ids, on_commit, run_db,
+    shutdown_executor, track_queries
+)
+from export import EXPORT_FORMATS, EXPORT_MAX_CONCURRENT, exports_running, stream_export
+from importer import DEFAULT_CHUNK_SETS, IMPORT_FORMATS, import_log
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, UNMATCHED_ROUTE, render_metrics, request_metrics
+from records import SET_IMAGE_COLUMNS, apply_set_changes, fetch_set_images, rebuild_records
+from rollups import refresh_daily_aggregates, summarize, workout_days
+from search import SEARCH_SOURCES, search_notes
 
 app = FastAPI(title="Workout App", description="API for tracking workouts")
 
+logger = logging.getLogger("workout.queries")
+
+# Statements one request may run before its log line becomes a warning.
+# Per-route overrides look like "GET /workouts/history=5,PUT /workouts/{workout_id}/sets=20";
+# a budget of 0 turns the warning off.
+QUERY_BUDGET = int(os.getenv("WORKOUT_QUERY_BUDGET", "50"))
+QUERY_BUDGETS = {
+    route.strip(): int(budget)
+    for route, _, budget in (
+        item.rpartition("=") for item in os.getenv("WORKOUT_QUERY_BUDGETS", "").split(",") if item.strip()
+    )
+}
+
+CONDITIONAL_PATHS = re.compile(r"^/(workouts/history|records|records/\d+(/progression)?|exercises(/suggest)?|templates|search)$")
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    tags = [t.strip() for t in header.split(",")]
+    return "*" in tags or any(t.removeprefix("W/") == etag.removeprefix("W/") for t in tags)
+
+
+def _not_modified_since(header: str, updated_at: int) -> bool:
+    try:
+        return updated_at <= parsedate_to_datetime(header).timestamp()
+    except (TypeError, ValueError):
+        return False
+
+
+def _match_route(scope) -> Optional[BaseRoute]:
+    for route in app.router.routes:
+        match, _ = route.matches(scope)
+        if match is Match.FULL:
+            return route
+    return None
+
+
+# Every write bumps the data version, so an unchanged version means the
+# previous response is still valid and the handler need not run at all.
+@app.middleware("http")
+async def conditional_get(request: Request, call_next):
+    if request.method != "GET" or not CONDITIONAL_PATHS.match(request.url.path):
+        return await call_next(request)
+
+    version, updated_at = await run_db(data_version)
+    headers = {
+        "ETag": f'W/"{version}"',
+        "Last-Modified": formatdate(updated_at, usegmt=True),
+        "Cache-Control": "no-cache",
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_none_match is not None:
+        not_modified = _etag_matches(if_none_match, headers["ETag"])
+    else:
+        not_modified = if_modified_since is not None and _not_modified_since(if_modified_since, updated_at)
+    if not_modified:
+        # The router never sees a 304, so record its route for the metrics
+        # and the query budget the way routing would have.
+        request.scope["route"] = _match_route(request.scope)
+        return Response(status_code=304, headers=headers)
+
+    response = await call_next(request)
+    if response.status_code == 200:
+        response.headers.update(headers)
+    return response
+
+
+def _finish_request(request: Request, status: int, stats, started: float) -> None:
+    elapsed = time.perf_counter() - started
+    matched = request.scope.get("route")
+    route = f"{request.method} {matched.path if matched else request.url.path}"
+    budget = QUERY_BUDGETS.get(route, QUERY_BUDGET)
+    over = budget > 0 and stats.queries > budget
+    logger.log(
+        logging.WARNING if over else logging.INFO,
+        "%s -> %d: %d queries%s, db %.2f ms, pool wait %.2f ms, total %.2f ms",
+        route, status, stats.queries, f" (budget {budget})" if over else "",
+        stats.db_seconds * 1000, stats.wait_seconds * 1000, elapsed * 1000,
+        extra={"route": route, "queries": stats.queries, "budget": budget}
+    )
+    request_metrics.finished(request.method, matched.path if matched else UNMATCHED_ROUTE, status, elapsed, stats)
+
+
+async def _finish_after_body(body, request: Request, status: int, stats, started: float):
+    try:
+        async for chunk in body:
+            yield chunk
+    finally:
+        _finish_request(request, status, stats, started)
+
+
+# Outside conditional_get so 304s are timed too. The headers carry what ran
+# before the response started; the log line and metrics wait for the body,
+# so streamed exports are counted in full there.
+@app.middleware("http")
+async def query_timing(request: Request, call_next):
+    started = time.perf_counter()
+    request_metrics.started()
+    # Decremented here rather than after the body: a client that disconnects
+    # before the body starts never runs the body iterator's cleanup.
+    with track_queries() as stats:
+        try:
+            response = await call_next(request)
+        except Exception:
+            _finish_request(request, 500, stats, started)
+            raise
+        finally:
+            request_metrics.responded()
+
+    response.headers["X-Query-Count"] = str(stats.queries)
+    response.headers["Server-Timing"] = (
+        f'db;dur={stats.db_seconds * 1000:.2f};desc="{stats.queries} queries", '
+        f"pool;dur={stats.wait_seconds * 1000:.2f}, "
+        f"total;dur={(time.perf_counter() - started) * 1000:.2f}"
+    )
+    response.body_iterator = _finish_after_body(response.body_iterator, request, response.status_code, stats, started)
+    return response
+
+
+# Added after the middleware above so CORS headers also reach 304 responses.
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
@@ -16,6 +164,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Query-Count"],
 )
 
 NonEmptyStr = constr(strip_whitespace=True, min_length=1)
@@ -47,6 +196,17 @@ class SetCreate(BaseModel):
     set_number: Optional[int] = Field(default=None, gt=0)
 
 
+class WorkoutSetCreate(BaseModel):
+    exercise_id: int
+    weight: float = Field(ge=0)
+    reps: int = Field(gt=0)
+    set_number: Optional[int] = Field(default=None, gt=0)
+
+
+class WorkoutWithSetsCreate(WorkoutCreate):
+    sets: list[WorkoutSetCreate] = []
+
+
 class SetUpdate(BaseModel):
     exercise_id: Optional[int] = None
     weight: Optional[float] = Field(default=None, ge=0)
@@ -133,6 +293,20 @@ class WorkoutListItem(BaseModel):
     total_volume: float
 
 
+class HistorySummary(BaseModel):
+    total_workouts: int
+    total_unique_exercises: int
+    total_sets: int
+    total_volume: float
+    avg_volume_per_workout: float
+
+
+class WorkoutHistoryPage(BaseModel):
+    workouts: list[WorkoutListItem]
+    next_cursor: Optional[str] = None
+    summary: Optional[HistorySummary] = None
+
+
 class ExerciseRecord(BaseModel):
     exercise_id: int
     exercise_name: str
@@ -154,22 +328,47 @@ class ExerciseRecord(BaseModel):
 @app.on_event("startup")
 async def startup_event():
     init_db()
-    seed_exercises()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    shutdown_executor()
+    close_pool()
 
 
 @app.post("/workouts", status_code=201)
-async def create_workout(workout: WorkoutCreate):
+@db_handler
+def create_workout(workout: WorkoutCreate):
     with get_conn() as conn:
         cursor = conn.execute(
             "INSERT INTO Workouts (date, type, note) VALUES (?, ?, ?)",
             (workout.date, workout.type, workout.note)
         )
         workout_id = cursor.lastrowid
+        refresh_daily_aggregates(conn, [(workout.date, workout.type)])
     return {"id": workout_id}
 
 
+@app.post("/workouts/full", status_code=201, response_model=WorkoutResponse)
+@db_handler
+def create_workout_full(payload: WorkoutWithSetsCreate):
+    with get_conn() as conn:
+        cursor = conn.execute(
+            "INSERT INTO Workouts (date, type, note) VALUES (?, ?, ?)",
+            (payload.date, payload.type, payload.note)
+        )
+        workout_id = cursor.lastrowid
+
+        if payload.sets:
+            _insert_workout_sets(conn, workout_id, payload.sets)
+        refresh_daily_aggregates(conn, [(payload.date, payload.type)])
+
+        return _fetch_workout_response(conn, workout_id)
+
+
 @app.post("/exercises", status_code=201)
-async def create_exercise(exercise: ExerciseCreate):
+@db_handler
+def create_exercise(exercise: ExerciseCreate):
     try:
         with get_conn() as conn:
             cursor = conn.execute(
@@ -177,20 +376,21 @@ async def create_exercise(exercise: ExerciseCreate):
                 (exercise.name, exercise.muscle_group, exercise.note)
             )
             exercise_id = cursor.lastrowid
+            mark_catalog_changed(conn)
+            invalidate_on_commit(conn, ["exercises"])
         return {"id": exercise_id}
     except sqlite3.IntegrityError:
         raise HTTPException(status_code=400, detail="Exercise with this name already exists")
 
 
 @app.patch("/exercises/{exercise_id}")
-async def update_exercise(exercise_id: int, payload: ExerciseUpdate):
+@db_handler
+def update_exercise(exercise_id: int, payload: ExerciseUpdate):
     if payload.name is None and payload.muscle_group is None and payload.note is None:
         raise HTTPException(status_code=400, detail="Nothing to update")
 
     with get_conn() as conn:
-        existing = conn.execute("SELECT id FROM Exercises WHERE id = ?", (exercise_id,)).fetchone()
-        if not existing:
-            raise HTTPException(status_code=404, detail=f"Exercise with id={exercise_id} not found")
+        _require_exercises(conn, [exercise_id])
 
         if payload.name is not None:
             try:
@@ -208,16 +408,17 @@ async def update_exercise(exercise_id: int, payload: ExerciseUpdate):
             "SELECT id, name, muscle_group, note FROM Exercises WHERE id = ?",
             (exercise_id,)
         ).fetchone()
+        mark_catalog_changed(conn)
+        invalidate_on_commit(conn, ["exercises", f"exercise:{exercise_id}"])
 
     return dict(updated)
 
 
 @app.delete("/exercises/{exercise_id}", status_code=204)
-async def delete_exercise(exercise_id: int):
+@db_handler
+def delete_exercise(exercise_id: int):
     with get_conn() as conn:
-        existing = conn.execute("SELECT id FROM Exercises WHERE id = ?", (exercise_id,)).fetchone()
-        if not existing:
-            raise HTTPException(status_code=404, detail=f"Exercise with id={exercise_id} not found")
+        _require_exercises(conn, [exercise_id])
         
         sets_count = conn.execute(
             "SELECT COUNT(*) as count FROM Sets WHERE exercise_id = ?", 
@@ -244,37 +445,62 @@ async def delete_exercise(exercise_id: int):
         cur = conn.execute("DELETE FROM Exercises WHERE id = ?", (exercise_id,))
         if cur.rowcount == 0:
             raise HTTPException(status_code=404, detail="Exercise not found")
+        mark_catalog_changed(conn)
+        invalidate_on_commit(conn, ["exercises", f"exercise:{exercise_id}"])
     
     return None
 
 
+SET_COLUMNS = "id, workout_id, exercise_id, weight, reps, set_number"
+
+
+def _require_exercises(conn: sqlite3.Connection, exercise_ids: list[int]) -> dict[int, dict]:
+    exercises = exercise_catalog.snapshot(conn, expect=exercise_ids)
+    for exercise_id in exercise_ids:
+        if exercise_id not in exercises:
+            raise HTTPException(status_code=404, detail=f"Exercise with id={exercise_id} not found")
+    return exercises
+
+
+# Exercise names and muscle groups come from the catalog instead of a JOIN.
+def _set_responses(conn: sqlite3.Connection, rows) -> list[dict]:
+    exercises = exercise_catalog.snapshot(conn, expect={r["exercise_id"] for r in rows})
+    return [
+        {
+            "id": r["id"],
+            "workout_id": r["workout_id"],
+            "exercise_id": r["exercise_id"],
+            "exercise_name": exercises[r["exercise_id"]]["name"],
+            "muscle_group": exercises[r["exercise_id"]]["muscle_group"],
+            "weight": r["weight"],
+            "reps": r["reps"],
+            "set_number": r["set_number"],
+        }
+        for r in rows
+    ]
+
+
 @app.get("/sets/{set_id}")
-async def get_set(set_id: int):
+@db_handler
+def get_set(set_id: int):
     with get_conn() as conn:
-        set_data = conn.execute("""
-            SELECT s.id, s.workout_id, s.exercise_id, e.name as exercise_name,
-                   e.muscle_group, s.weight, s.reps, s.set_number
-            FROM Sets s
-            JOIN Exercises e ON s.exercise_id = e.id
-            WHERE s.id = ?
-        """, (set_id,)).fetchone()
+        set_data = conn.execute(f"SELECT {SET_COLUMNS} FROM Sets WHERE id = ?", (set_id,)).fetchone()
         
         if not set_data:
             raise HTTPException(status_code=404, detail=f"Set with id={set_id} not found")
     
-    return dict(set_data)
+        return _set_responses(conn, [set_data])[0]
 
 
 @app.post("/sets", status_code=201)
-async def create_set(set_data: SetCreate):
+@db_handler
+def create_set(set_data: SetCreate):
     with get_conn() as conn:
         workout = conn.execute("SELECT id FROM Workouts WHERE id = ?", (set_data.workout_id,)).fetchone()
         if not workout:
             raise HTTPException(status_code=404, detail=f"Workout with id={set_data.workout_id} not found")
 
-        exercise = conn.execute("SELECT id FROM Exercises WHERE id = ?", (set_data.exercise_id,)).fetchone()
-        if not exercise:
-            raise HTTPException(status_code=404, detail=f"Exercise with id={set_data.exercise_id} not found")
+        _require_exercises(conn, [set_data.exercise_id])
 
         cursor = conn.execute(
             """INSERT INTO Sets (workout_id, exercise_id, weight, reps, set_number)
@@ -282,26 +508,76 @@ async def create_set(set_data: SetCreate):
             (set_data.workout_id, set_data.exercise_id, set_data.weight, set_data.reps, set_data.set_number)
         )
         set_id = cursor.lastrowid
+        _apply_set_changes(conn, inserted=fetch_set_images(conn, "id = ?", (set_id,)))
+        refresh_daily_aggregates(conn, workout_days(conn, [set_data.workout_id]))
 
     return {"id": set_id}
 
 
+# Evicts the cached workouts and per-exercise records the changed sets belong to.
+def _apply_set_changes(conn: sqlite3.Connection, removed=(), inserted=()) -> None:
+    removed = list(removed)
+    inserted = list(inserted)
+    apply_set_changes(conn, removed=removed, inserted=inserted)
+    invalidate_on_commit(
+        conn,
+        {f"workout:{s['workout_id']}" for s in removed + inserted}
+        | {f"record:{s['exercise_id']}" for s in removed + inserted}
+    )
+
+
+def _invalidate_workout(conn: sqlite3.Connection, workout_id: int) -> None:
+    rows = conn.execute("SELECT DISTINCT exercise_id FROM Sets WHERE workout_id = ?", (workout_id,)).fetchall()
+    invalidate_on_commit(conn, [f"workout:{workout_id}", *(f"record:{r['exercise_id']}" for r in rows)])
+
+
+def _insert_workout_sets(conn: sqlite3.Connection, workout_id: int, sets: list[WorkoutSetCreate]) -> list[int]:
+    _require_exercises(conn, list(dict.fromkeys(s.exercise_id for s in sets)))
+
+    conn.executemany(
+        """INSERT INTO Sets (workout_id, exercise_id, weight, reps, set_number)
+           VALUES (?, ?, ?, ?, ?)""",
+        [(workout_id, s.exercise_id, s.weight, s.reps, s.set_number) for s in sets]
+    )
+    set_ids = inserted_ids(conn, len(sets))
+
+    _apply_set_changes(conn, inserted=[
+        {"id": set_id, "workout_id": workout_id, "exercise_id": s.exercise_id, "weight": s.weight, "reps": s.reps}
+        for set_id, s in zip(set_ids, sets)
+    ])
+    return set_ids
+
+
+@app.post("/workouts/{workout_id}/sets/batch", status_code=201)
+@db_handler
+def create_workout_sets_batch(workout_id: int, sets: list[WorkoutSetCreate]):
+    if not sets:
+        raise HTTPException(status_code=400, detail="Sets list cannot be empty")
+
+    with get_conn() as conn:
+        workout = conn.execute("SELECT id FROM Workouts WHERE id = ?", (workout_id,)).fetchone()
+        if not workout:
+            raise HTTPException(status_code=404, detail=f"Workout with id={workout_id} not found")
+
+        set_ids = _insert_workout_sets(conn, workout_id, sets)
+        refresh_daily_aggregates(conn, workout_days(conn, [workout_id]))
+
+    return {"ids": set_ids}
+
+
 @app.patch("/sets/{set_id}")
-async def update_set(set_id: int, payload: SetUpdate):
+@db_handler
+def update_set(set_id: int, payload: SetUpdate):
     if payload.exercise_id is None and payload.weight is None and payload.reps is None and payload.set_number is None:
         raise HTTPException(status_code=400, detail="Nothing to update")
 
     with get_conn() as conn:
-        existing = conn.execute("SELECT id, workout_id FROM Sets WHERE id = ?", (set_id,)).fetchone()
+        existing = conn.execute(f"SELECT {SET_IMAGE_COLUMNS} FROM Sets WHERE id = ?", (set_id,)).fetchone()
         if not existing:
             raise HTTPException(status_code=404, detail=f"Set with id={set_id} not found")
 
         if payload.exercise_id is not None:
-            exercise = conn.execute("SELECT id FROM Exercises WHERE id = ?", (payload.exercise_id,)).fetchone()
-            if not exercise:
-                raise HTTPException(status_code=404, detail=f"Exercise with id={payload.exercise_id} not found")
-
-        if payload.exercise_id is not None:
+            _require_exercises(conn, [payload.exercise_id])
             conn.execute("UPDATE Sets SET exercise_id = ? WHERE id = ?", (payload.exercise_id, set_id))
         
         if payload.weight is not None:
@@ -313,97 +589,64 @@ async def update_set(set_id: int, payload: SetUpdate):
         if payload.set_number is not None:
             conn.execute("UPDATE Sets SET set_number = ? WHERE id = ?", (payload.set_number, set_id))
 
-        updated = conn.execute("""
-            SELECT s.id, s.workout_id, s.exercise_id, e.name as exercise_name,
-                   e.muscle_group, s.weight, s.reps, s.set_number
-            FROM Sets s
-            JOIN Exercises e ON s.exercise_id = e.id
-            WHERE s.id = ?
-        """, (set_id,)).fetchone()
+        _apply_set_changes(conn, removed=[existing], inserted=fetch_set_images(conn, "id = ?", (set_id,)))
+        refresh_daily_aggregates(conn, workout_days(conn, [existing["workout_id"]]))
 
-    return dict(updated)
+        updated = conn.execute(f"SELECT {SET_COLUMNS} FROM Sets WHERE id = ?", (set_id,)).fetchone()
+
+        return _set_responses(conn, [updated])[0]
 
 
 @app.delete("/sets/{set_id}", status_code=204)
-async def delete_set(set_id: int):
+@db_handler
+def delete_set(set_id: int):
     with get_conn() as conn:
+        removed = fetch_set_images(conn, "id = ?", (set_id,))
         cur = conn.execute("DELETE FROM Sets WHERE id = ?", (set_id,))
         if cur.rowcount == 0:
             raise HTTPException(status_code=404, detail=f"Set with id={set_id} not found")
+        _apply_set_changes(conn, removed=removed)
+        refresh_daily_aggregates(conn, workout_days(conn, [removed[0]["workout_id"]]))
     return None
 
 
+def _apply_set_updates(conn: sqlite3.Connection, workout_id: int, updates: list[BulkSetUpdate]) -> list[sqlite3.Row]:
+    set_ids = list(dict.fromkeys(u.set_id for u in updates))
+    previous = {
+        r["id"]: r
+        for r in conn.execute(
+            f"SELECT {SET_IMAGE_COLUMNS} FROM Sets WHERE workout_id = ? AND id IN ({', '.join('?' for _ in set_ids)})",
+            [workout_id, *set_ids]
+        )
+    }
+    for set_id in set_ids:
+        if set_id not in previous:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Set with id={set_id} not found or does not belong to this workout"
+            )
+
+    _require_exercises(conn, list(dict.fromkeys(u.exercise_id for u in updates if u.exercise_id is not None)))
+
+    conn.executemany(
+        """UPDATE Sets
+           SET exercise_id = COALESCE(?, exercise_id),
+               weight = COALESCE(?, weight),
+               reps = COALESCE(?, reps),
+               set_number = COALESCE(?, set_number)
+           WHERE id = ?""",
+        [(u.exercise_id, u.weight, u.reps, u.set_number, u.set_id) for u in updates]
+    )
+    return [previous[set_id] for set_id in set_ids]
+
+
 @app.put("/workouts/{workout_id}/sets", status_code=200)
-async def bulk_update_workout_sets(workout_id: int, sets: list[BulkSetUpdate]):
+@db_handler
+def bulk_update_workout_sets(workout_id: int, sets: list[BulkSetUpdate]):
     if not sets:
         raise HTTPException(status_code=400, detail="Sets list cannot be empty")
     
     with get_conn() as conn:
-        workout = conn.execute("SELECT id FROM Workouts WHERE id = ?", (workout_id,)).fetchone()
-        if not workout:
-            raise HTTPException(status_code=404, detail=f"Workout with id={workout_id} not found")
-        
-        updated_sets = []
-        
-        for set_update in sets:
-            existing = conn.execute(
-                "SELECT id, workout_id FROM Sets WHERE id = ? AND workout_id = ?",
-                (set_update.set_id, workout_id)
-            ).fetchone()
-            
-            if not existing:
-                raise HTTPException(
-                    status_code=404,
-                    detail=f"Set with id={set_update.set_id} not found or does not belong to this workout"
-                )
-            
-            if set_update.exercise_id is not None:
-                exercise = conn.execute(
-                    "SELECT id FROM Exercises WHERE id = ?", 
-                    (set_update.exercise_id,)
-                ).fetchone()
-                if not exercise:
-                    raise HTTPException(
-                        status_code=404,
-                        detail=f"Exercise with id={set_update.exercise_id} not found"
-                    )
-            
-            updates = []
-            params = []
-            
-            if set_update.exercise_id is not None:
-                updates.append("exercise_id = ?")
-                params.append(set_update.exercise_id)
-            
-            if set_update.weight is not None:
-                updates.append("weight = ?")
-                params.append(set_update.weight)
-            
-            if set_update.reps is not None:
-                updates.append("reps = ?")
-                params.append(set_update.reps)
-            
-            if set_update.set_number is not None:
-                updates.append("set_number = ?")
-                params.append(set_update.set_number)
-            
-            if updates:
-                params.append(set_update.set_id)
-                conn.execute(
-                    f"UPDATE Sets SET {', '.join(updates)} WHERE id = ?",
-                    params
-                )
-            
-            updated = conn.execute("""
-                SELECT s.id, s.workout_id, s.exercise_id, e.name as exercise_name,
-                       e.muscle_group, s.weight, s.reps, s.set_number
-                FROM Sets s
-                JOIN Exercises e ON s.exercise_id = e.id
-                WHERE s.id = ?
-            """, (set_update.set_id,)).fetchone()
-            
-            updated_sets.append(dict(updated))
-        
         workout_full = conn.execute(
             """SELECT w.id, w.date, w.type, w.note, w.template_id, 
                       t.name as template_name
@@ -412,46 +655,150 @@ async def bulk_update_workout_sets(workout_id: int, sets: list[BulkSetUpdate]):
                WHERE w.id = ?""",
             (workout_id,)
         ).fetchone()
+        if not workout_full:
+            raise HTTPException(status_code=404, detail=f"Workout with id={workout_id} not found")
         
-        all_sets = conn.execute("""
-            SELECT s.id, s.workout_id, s.exercise_id, e.name as exercise_name,
-                   e.muscle_group, s.weight, s.reps, s.set_number
-            FROM Sets s
-            JOIN Exercises e ON s.exercise_id = e.id
-            WHERE s.workout_id = ?
-            ORDER BY s.set_number, s.id
-        """, (workout_id,)).fetchall()
+        previous_sets = _apply_set_updates(conn, workout_id, sets)
+        
+        all_sets = _set_responses(conn, conn.execute(
+            f"SELECT {SET_COLUMNS} FROM Sets WHERE workout_id = ? ORDER BY set_number, id",
+            (workout_id,)
+        ).fetchall())
+        
+        updated_ids = {s["id"] for s in previous_sets}
+        _apply_set_changes(conn, removed=previous_sets, inserted=[s for s in all_sets if s["id"] in updated_ids])
+        refresh_daily_aggregates(conn, [(workout_full["date"], workout_full["type"])])
         
         return {
             "workout": dict(workout_full),
-            "sets": [dict(s) for s in all_sets],
-            "updated_count": len(updated_sets)
+            "sets": all_sets,
+            "updated_count": len(sets)
         }
 
 
+@app.get("/health/cache")
+async def cache_health():
+    return response_cache.stats()
+
+
+@app.get("/metrics")
+async def metrics():
+    return Response(render_metrics(pool_stats(), response_cache.stats()), media_type=METRICS_CONTENT_TYPE)
+
+
 @app.get("/")
 async def root():
     return {"message": "Workout App API", "docs": "/docs", "openapi": "/openapi.json"}
 
 
-@app.get("/workouts/history")
-async def get_workout_history(
-    type: Optional[str] = Query(None, description="Filter by workout type"),
-    date_from: Optional[str] = Query(None, description="Filter from date (YYYY-MM-DD)"),
-    date_to: Optional[str] = Query(None, description="Filter to date (YYYY-MM-DD)"),
-    template_id: Optional[int] = Query(None, description="Filter by template id"),
-    limit: Optional[int] = Query(None, ge=1, le=1000, description="Maximum number of results"),
-    include_stats: bool = Query(True, description="Include overall statistics in response")
-):
+@app.get("/health/db")
+@db_handler
+def db_health():
     with get_conn() as conn:
+        conn.execute("SELECT 1").fetchone()
+    return pool_stats()
+
+
+def _encode_cursor(row) -> str:
+    raw = json.dumps([row["date"], row["id"]]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[str, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        date, workout_id = json.loads(raw)
+        if not isinstance(date, str) or not isinstance(workout_id, int):
+            raise ValueError
+    except (binascii.Error, ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return date, workout_id
+
+
+def _next_cursor(rows, limit: Optional[int]) -> Optional[str]:
+    if limit and len(rows) == limit:
+        return _encode_cursor(rows[-1])
+    return None
+
+
+# Correlated lookups on the covering idx_sets_workout_totals index: they run
+# only for the rows of the page and, unlike a join with GROUP BY, need no
+# temp B-tree to group or re-sort them.
+_WORKOUT_TOTALS = """,
+               (SELECT COUNT(DISTINCT s.exercise_id) FROM Sets s WHERE s.workout_id = w.id) as exercises_count,
+               (SELECT COUNT(*) FROM Sets s WHERE s.workout_id = w.id) as sets_count,
+               (SELECT COALESCE(SUM(s.weight * s.reps), 0) FROM Sets s WHERE s.workout_id = w.id) as total_volume"""
+
+
+def _workout_page_query(
+    type: Optional[str],
+    date_from: Optional[str],
+    date_to: Optional[str],
+    template_id: Optional[int],
+    limit: Optional[int],
+    cursor: Optional[str] = None,
+    columns: str = ""
+) -> tuple[str, list]:
+    query = f"""
+        SELECT w.id, w.date, w.type, w.note, w.template_id, 
+               t.name as template_name{columns}
+        FROM Workouts w
+        LEFT JOIN Templates t ON w.template_id = t.id
+        WHERE 1=1
+    """
+    params = []
+    
+    if type:
+        query += " AND w.type = ?"
+        params.append(type)
+    
+    if date_from:
+        query += " AND w.date >= ?"
+        params.append(date_from)
+    
+    if date_to:
+        query += " AND w.date <= ?"
+        params.append(date_to)
+    
+    if template_id is not None:
+        query += " AND w.template_id = ?"
+        params.append(template_id)
+    
+    if cursor:
+        query += " AND (w.date, w.id) < (?, ?)"
+        params.extend(_decode_cursor(cursor))
+    
+    query += " ORDER BY w.date DESC, w.id DESC"
+    
+    if limit:
+        query += " LIMIT ?"
+        params.append(limit)
+    
+    return query, params
+
+
+def _history_summary(
+    conn: sqlite3.Connection,
+    type: Optional[str],
+    date_from: Optional[str],
+    date_to: Optional[str],
+    template_id: Optional[int]
+) -> dict:
+    if template_id is None:
+        totals = summarize(conn, type, date_from, date_to)
+    else:
+        # The daily rollup is keyed by (date, type), so template filters read raw rows.
         query = """
-            SELECT w.id, w.date, w.type, w.note, w.template_id, 
-                   t.name as template_name
+            SELECT 
+                COUNT(DISTINCT w.id) as total_workouts,
+                COUNT(DISTINCT s.exercise_id) as total_unique_exercises,
+                COUNT(s.id) as total_sets,
+                COALESCE(SUM(s.weight * s.reps), 0) as total_volume
             FROM Workouts w
-            LEFT JOIN Templates t ON w.template_id = t.id
-            WHERE 1=1
+            LEFT JOIN Sets s ON w.id = s.workout_id
+            WHERE w.template_id = ?
         """
-        params = []
+        params = [template_id]
         
         if type:
             query += " AND w.type = ?"
@@ -465,51 +812,65 @@ async def get_workout_history(
             query += " AND w.date <= ?"
             params.append(date_to)
         
-        if template_id is not None:
-            query += " AND w.template_id = ?"
-            params.append(template_id)
-        
-        query += " ORDER BY w.date DESC, w.id DESC"
-        
-        if limit:
-            query += " LIMIT ?"
-            params.append(limit)
-        
+        totals = dict(conn.execute(query, params).fetchone())
+    
+    total_workouts = totals["total_workouts"] or 0
+    total_volume = totals["total_volume"] or 0.0
+    return {
+        "total_workouts": total_workouts,
+        "total_unique_exercises": totals["total_unique_exercises"] or 0,
+        "total_sets": totals["total_sets"] or 0,
+        "total_volume": total_volume,
+        "avg_volume_per_workout": round(total_volume / total_workouts, 2) if total_workouts else 0.0
+    }
+
+
+@app.get("/workouts/history", response_model=WorkoutHistoryPage)
+@db_handler
+def get_workout_history(
+    type: Optional[str] = Query(None, description="Filter by workout type"),
+    date_from: Optional[str] = Query(None, description="Filter from date (YYYY-MM-DD)"),
+    date_to: Optional[str] = Query(None, description="Filter to date (YYYY-MM-DD)"),
+    template_id: Optional[int] = Query(None, description="Filter by template id"),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Maximum number of results"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page's next_cursor"),
+    include_stats: bool = Query(True, description="Include overall statistics in response")
+):
+    query, params = _workout_page_query(type, date_from, date_to, template_id, limit, cursor, _WORKOUT_TOTALS)
+
+    with get_conn() as conn:
         rows = conn.execute(query, params).fetchall()
         
-        result = []
-        for row in rows:
-            stats = conn.execute("""
-                SELECT 
-                    COUNT(DISTINCT s.exercise_id) as exercises_count,
-                    COUNT(s.id) as sets_count,
-                    COALESCE(SUM(s.weight * s.reps), 0) as total_volume
-                FROM Sets s
-                WHERE s.workout_id = ?
-            """, (row["id"],)).fetchone()
-            
-            result.append(WorkoutListItem(
+        result = [
+            WorkoutListItem(
                 id=row["id"],
                 date=row["date"],
                 type=row["type"],
                 note=row["note"],
                 template_id=row["template_id"],
                 template_name=row["template_name"],
-                sets_count=stats["sets_count"] or 0,
-                exercises_count=stats["exercises_count"] or 0,
-                total_volume=stats["total_volume"] or 0.0
-            ))
+                sets_count=row["sets_count"] or 0,
+                exercises_count=row["exercises_count"] or 0,
+                total_volume=row["total_volume"] or 0.0
+            )
+            for row in rows
+        ]
+        
+        summary = None
+        if include_stats and rows:
+            summary = _history_summary(conn, type, date_from, date_to, template_id)
     
-    return result
+    return WorkoutHistoryPage(workouts=result, next_cursor=_next_cursor(rows, limit), summary=summary)
 
 
 @app.patch("/workouts/{workout_id}")
-async def update_workout(workout_id: int, payload: WorkoutUpdate):
+@db_handler
+def update_workout(workout_id: int, payload: WorkoutUpdate):
     if payload.date is None and payload.type is None and payload.note is None:
         raise HTTPException(status_code=400, detail="Nothing to update")
 
     with get_conn() as conn:
-        existing = conn.execute("SELECT id FROM Workouts WHERE id = ?", (workout_id,)).fetchone()
+        existing = conn.execute("SELECT id, date, type FROM Workouts WHERE id = ?", (workout_id,)).fetchone()
         if not existing:
             raise HTTPException(status_code=404, detail=f"Workout with id={workout_id} not found")
 
@@ -519,6 +880,7 @@ async def update_workout(workout_id: int, payload: WorkoutUpdate):
             conn.execute("UPDATE Workouts SET type = ? WHERE id = ?", (payload.type, workout_id))
         if payload.note is not None:
             conn.execute("UPDATE Workouts SET note = ? WHERE id = ?", (payload.note, workout_id))
+        _invalidate_workout(conn, workout_id)
 
         updated = conn.execute(
             """SELECT w.id, w.date, w.type, w.note, w.template_id, 
@@ -528,234 +890,148 @@ async def update_workout(workout_id: int, payload: WorkoutUpdate):
                WHERE w.id = ?""",
             (workout_id,)
         ).fetchone()
+        refresh_daily_aggregates(conn, [(existing["date"], existing["type"]), (updated["date"], updated["type"])])
 
     return dict(updated)
 
 
 @app.put("/workouts/{workout_id}/full", status_code=200)
-async def update_workout_full(workout_id: int, payload: WorkoutWithSetsUpdate):
+@db_handler
+def update_workout_full(workout_id: int, payload: WorkoutWithSetsUpdate):
     with get_conn() as conn:
-        existing = conn.execute("SELECT id FROM Workouts WHERE id = ?", (workout_id,)).fetchone()
-        if not existing:
+        previous_days = workout_days(conn, [workout_id])
+        cur = conn.execute(
+            """UPDATE Workouts
+               SET date = COALESCE(?, date), type = COALESCE(?, type), note = COALESCE(?, note)
+               WHERE id = ?""",
+            (payload.date, payload.type, payload.note, workout_id)
+        )
+        if cur.rowcount == 0:
             raise HTTPException(status_code=404, detail=f"Workout with id={workout_id} not found")
+        _invalidate_workout(conn, workout_id)
 
-        if payload.date is not None:
-            conn.execute("UPDATE Workouts SET date = ? WHERE id = ?", (payload.date, workout_id))
-        if payload.type is not None:
-            conn.execute("UPDATE Workouts SET type = ? WHERE id = ?", (payload.type, workout_id))
-        if payload.note is not None:
-            conn.execute("UPDATE Workouts SET note = ? WHERE id = ?", (payload.note, workout_id))
+        previous_sets = []
+        if payload.sets:
+            previous_sets = _apply_set_updates(conn, workout_id, payload.sets)
 
-        if payload.sets is not None:
-            for set_update in payload.sets:
-                existing_set = conn.execute(
-                    "SELECT id, workout_id FROM Sets WHERE id = ? AND workout_id = ?",
-                    (set_update.set_id, workout_id)
-                ).fetchone()
-                
-                if not existing_set:
-                    raise HTTPException(
-                        status_code=404,
-                        detail=f"Set with id={set_update.set_id} not found or does not belong to this workout"
-                    )
-                
-                if set_update.exercise_id is not None:
-                    exercise = conn.execute(
-                        "SELECT id FROM Exercises WHERE id = ?",
-                        (set_update.exercise_id,)
-                    ).fetchone()
-                    if not exercise:
-                        raise HTTPException(
-                            status_code=404,
-                            detail=f"Exercise with id={set_update.exercise_id} not found"
-                        )
-                
-                updates = []
-                params = []
-                
-                if set_update.exercise_id is not None:
-                    updates.append("exercise_id = ?")
-                    params.append(set_update.exercise_id)
-                
-                if set_update.weight is not None:
-                    updates.append("weight = ?")
-                    params.append(set_update.weight)
-                
-                if set_update.reps is not None:
-                    updates.append("reps = ?")
-                    params.append(set_update.reps)
-                
-                if set_update.set_number is not None:
-                    updates.append("set_number = ?")
-                    params.append(set_update.set_number)
-                
-                if updates:
-                    params.append(set_update.set_id)
-                    conn.execute(
-                        f"UPDATE Sets SET {', '.join(updates)} WHERE id = ?",
-                        params
-                    )
+        workout = _fetch_workout_response(conn, workout_id)
 
-        workout = conn.execute(
-            """SELECT w.id, w.date, w.type, w.note, w.template_id, 
-                      t.name as template_name
-               FROM Workouts w
-               LEFT JOIN Templates t ON w.template_id = t.id
-               WHERE w.id = ?""",
-            (workout_id,)
-        ).fetchone()
-
-        sets = conn.execute("""
-            SELECT s.id, s.workout_id, s.exercise_id, e.name as exercise_name,
-                   e.muscle_group, s.weight, s.reps, s.set_number
-            FROM Sets s
-            JOIN Exercises e ON s.exercise_id = e.id
-            WHERE s.workout_id = ?
-            ORDER BY s.set_number, s.id
-        """, (workout_id,)).fetchall()
+        updated_ids = {s["id"] for s in previous_sets}
+        _apply_set_changes(
+            conn,
+            removed=previous_sets,
+            inserted=[s.model_dump() for s in workout.sets if s.id in updated_ids]
+        )
+        refresh_daily_aggregates(conn, previous_days | {(workout.date, workout.type)})
 
-    return WorkoutResponse(
-        id=workout["id"],
-        date=workout["date"],
-        type=workout["type"],
-        note=workout["note"],
-        template_id=workout["template_id"],
-        template_name=workout["template_name"],
-        sets=[
-            SetResponse(
-                id=s["id"],
-                workout_id=s["workout_id"],
-                exercise_id=s["exercise_id"],
-                exercise_name=s["exercise_name"],
-                muscle_group=s["muscle_group"],
-                weight=s["weight"],
-                reps=s["reps"],
-                set_number=s["set_number"]
-            )
-            for s in sets
-        ]
-    )
+    return workout
 
 
 @app.delete("/workouts/{workout_id}", status_code=204)
-async def delete_workout(workout_id: int):
+@db_handler
+def delete_workout(workout_id: int):
     with get_conn() as conn:
+        removed = fetch_set_images(conn, "workout_id = ?", (workout_id,))
+        days = workout_days(conn, [workout_id])
+        _invalidate_workout(conn, workout_id)
         cur = conn.execute("DELETE FROM Workouts WHERE id = ?", (workout_id,))
         if cur.rowcount == 0:
             raise HTTPException(status_code=404, detail="Workout not found")
+        _apply_set_changes(conn, removed=removed)
+        refresh_daily_aggregates(conn, days)
     return None
 
 
-@app.get("/workouts/history")
-async def get_workout_history(
+@app.get("/workouts/history/detailed")
+@db_handler
+def get_workout_history_detailed(
     type: Optional[str] = Query(None, description="Filter by workout type"),
     date_from: Optional[str] = Query(None, description="Filter from date (YYYY-MM-DD)"),
     date_to: Optional[str] = Query(None, description="Filter to date (YYYY-MM-DD)"),
     template_id: Optional[int] = Query(None, description="Filter by template id"),
     limit: Optional[int] = Query(None, ge=1, le=1000, description="Maximum number of results"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page's next_cursor"),
     include_stats: bool = Query(True, description="Include overall statistics in response")
 ):
+    query, params = _workout_page_query(type, date_from, date_to, template_id, limit, cursor)
+
     with get_conn() as conn:
-        query = """
-            SELECT w.id, w.date, w.type, w.note, w.template_id, 
-                   t.name as template_name
-            FROM Workouts w
-            LEFT JOIN Templates t ON w.template_id = t.id
-            WHERE 1=1
-        """
-        params = []
-        
-        if type:
-            query += " AND w.type = ?"
-            params.append(type)
-        
-        if date_from:
-            query += " AND w.date >= ?"
-            params.append(date_from)
-        
-        if date_to:
-            query += " AND w.date <= ?"
-            params.append(date_to)
-        
-        if template_id is not None:
-            query += " AND w.template_id = ?"
-            params.append(template_id)
-        
-        query += " ORDER BY w.date DESC, w.id DESC"
+        rows = conn.execute(query, params).fetchall()
         
-        if limit:
-            query += " LIMIT ?"
-            params.append(limit)
+        # Previous bests are running maxima over earlier workouts (by id) of the
+        # same exercise, so every set of the page is scored in one ordered pass.
+        sets = conn.execute(f"""
+            WITH page AS ({query}),
+            page_exercises AS (
+                SELECT DISTINCT s.exercise_id
+                FROM Sets s
+                WHERE s.workout_id IN (SELECT id FROM page)
+            ),
+            per_workout AS (
+                SELECT s.exercise_id, s.workout_id,
+                       MAX(s.weight) as max_weight,
+                       MAX(s.reps) as max_reps,
+                       MAX(s.weight * s.reps) as max_volume
+                FROM Sets s
+                WHERE s.exercise_id IN (SELECT exercise_id FROM page_exercises)
+                  AND s.workout_id <= (SELECT MAX(id) FROM page)
+                GROUP BY s.exercise_id, s.workout_id
+            ),
+            running AS (
+                SELECT exercise_id, workout_id,
+                       MAX(max_weight) OVER prior as max_weight_before,
+                       MAX(max_reps) OVER prior as max_reps_before,
+                       MAX(max_volume) OVER prior as max_volume_before
+                FROM per_workout
+                WINDOW prior AS (
+                    PARTITION BY exercise_id ORDER BY workout_id
+                    ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+                )
+            )
+            SELECT s.id, s.workout_id, s.exercise_id, e.name as exercise_name,
+                   e.muscle_group, s.weight, s.reps, s.set_number,
+                   r.max_weight_before, r.max_reps_before, r.max_volume_before
+            FROM Sets s
+            JOIN Exercises e ON s.exercise_id = e.id
+            JOIN running r ON r.exercise_id = s.exercise_id AND r.workout_id = s.workout_id
+            WHERE s.workout_id IN (SELECT id FROM page)
+            ORDER BY s.workout_id, s.set_number, s.id
+        """, params).fetchall()
         
-        rows = conn.execute(query, params).fetchall()
+        sets_by_workout = {}
+        for s in sets:
+            sets_by_workout.setdefault(s["workout_id"], []).append(s)
         
         history = []
         for row in rows:
-            stats = conn.execute("""
-                SELECT 
-                    COUNT(DISTINCT s.exercise_id) as exercises_count,
-                    COUNT(s.id) as sets_count,
-                    COALESCE(SUM(s.weight * s.reps), 0) as total_volume,
-                    COALESCE(MAX(s.weight), 0) as max_weight,
-                    COALESCE(AVG(s.weight), 0) as avg_weight
-                FROM Sets s
-                WHERE s.workout_id = ?
-            """, (row["id"],)).fetchone()
-            
-            exercises = conn.execute("""
-                SELECT DISTINCT e.id, e.name, e.muscle_group
-                FROM Sets s
-                JOIN Exercises e ON s.exercise_id = e.id
-                WHERE s.workout_id = ?
-                ORDER BY e.muscle_group, e.name
-            """, (row["id"],)).fetchall()
-            
-            sets = conn.execute("""
-                SELECT s.id, s.workout_id, s.exercise_id, e.name as exercise_name,
-                       e.muscle_group, s.weight, s.reps, s.set_number
-                FROM Sets s
-                JOIN Exercises e ON s.exercise_id = e.id
-                WHERE s.workout_id = ?
-                ORDER BY s.set_number, s.id
-            """, (row["id"],)).fetchall()
+            workout_sets = sets_by_workout.get(row["id"], [])
             
+            exercises = {}
             records_achieved = []
-            for s in sets:
+            total_volume = 0.0
+            total_weight = 0.0
+            max_weight = 0.0
+            for s in workout_sets:
                 exercise_id = s["exercise_id"]
                 weight = s["weight"]
                 reps = s["reps"]
                 volume = weight * reps
                 
-                max_weight_before = conn.execute("""
-                    SELECT MAX(weight) as max_weight
-                    FROM Sets
-                    WHERE exercise_id = ? AND workout_id < ?
-                """, (exercise_id, row["id"])).fetchone()
-                
-                max_weight_before_value = max_weight_before["max_weight"] if max_weight_before and max_weight_before["max_weight"] else 0
-                
-                max_reps_before = conn.execute("""
-                    SELECT MAX(reps) as max_reps
-                    FROM Sets
-                    WHERE exercise_id = ? AND workout_id < ?
-                """, (exercise_id, row["id"])).fetchone()
-                
-                max_reps_before_value = max_reps_before["max_reps"] if max_reps_before and max_reps_before["max_reps"] else 0
-                
-                max_volume_before = conn.execute("""
-                    SELECT MAX(weight * reps) as max_volume
-                    FROM Sets
-                    WHERE exercise_id = ? AND workout_id < ?
-                """, (exercise_id, row["id"])).fetchone()
-                
-                max_volume_before_value = max_volume_before["max_volume"] if max_volume_before and max_volume_before["max_volume"] else 0
+                exercises[exercise_id] = {
+                    "id": exercise_id,
+                    "name": s["exercise_name"],
+                    "muscle_group": s["muscle_group"]
+                }
+                total_volume += volume
+                total_weight += weight
+                max_weight = max(max_weight, weight)
                 
                 record_types = []
-                if weight > max_weight_before_value:
+                if weight > (s["max_weight_before"] or 0):
                     record_types.append("max_weight")
-                if reps > max_reps_before_value:
+                if reps > (s["max_reps_before"] or 0):
                     record_types.append("max_reps")
-                if volume > max_volume_before_value:
+                if volume > (s["max_volume_before"] or 0):
                     record_types.append("max_volume")
                 
                 if record_types:
@@ -777,13 +1053,13 @@ async def get_workout_history(
                 "template_id": row["template_id"],
                 "template_name": row["template_name"],
                 "statistics": {
-                    "exercises_count": stats["exercises_count"] or 0,
-                    "sets_count": stats["sets_count"] or 0,
-                    "total_volume": stats["total_volume"] or 0.0,
-                    "max_weight": stats["max_weight"] or 0.0,
-                    "avg_weight": round(stats["avg_weight"] or 0.0, 2)
+                    "exercises_count": len(exercises),
+                    "sets_count": len(workout_sets),
+                    "total_volume": total_volume,
+                    "max_weight": max_weight,
+                    "avg_weight": round(total_weight / len(workout_sets), 2) if workout_sets else 0.0
                 },
-                "exercises": [dict(e) for e in exercises],
+                "exercises": sorted(exercises.values(), key=lambda e: (e["muscle_group"], e["name"])),
                 "sets": [
                     {
                         "id": s["id"],
@@ -795,86 +1071,95 @@ async def get_workout_history(
                         "reps": s["reps"],
                         "set_number": s["set_number"]
                     }
-                    for s in sets
+                    for s in workout_sets
                 ],
                 "records_achieved": records_achieved if records_achieved else None
             }
             history.append(workout_data)
         
-        response = {"workouts": history}
+        response = {"workouts": history, "next_cursor": _next_cursor(rows, limit)}
         
         if include_stats and rows:
-            stats_query = """
-                SELECT 
-                    COUNT(DISTINCT w.id) as total_workouts,
-                    COUNT(DISTINCT s.exercise_id) as total_unique_exercises,
-                    COUNT(s.id) as total_sets,
-                    COALESCE(SUM(s.weight * s.reps), 0) as total_volume,
-                    COALESCE(AVG(daily_volume.vol), 0) as avg_volume_per_workout
-                FROM Workouts w
-                LEFT JOIN Sets s ON w.id = s.workout_id
-                LEFT JOIN (
-                    SELECT workout_id, SUM(weight * reps) as vol
-                    FROM Sets
-                    GROUP BY workout_id
-                ) daily_volume ON w.id = daily_volume.workout_id
-                WHERE 1=1
-            """
-            stats_params = []
-            
-            if type:
-                stats_query += " AND w.type = ?"
-                stats_params.append(type)
-            
-            if date_from:
-                stats_query += " AND w.date >= ?"
-                stats_params.append(date_from)
-            
-            if date_to:
-                stats_query += " AND w.date <= ?"
-                stats_params.append(date_to)
-            
-            if template_id is not None:
-                stats_query += " AND w.template_id = ?"
-                stats_params.append(template_id)
-            
-            total_stats = conn.execute(stats_query, stats_params).fetchone()
-            
-            response["summary"] = {
-                "total_workouts": total_stats["total_workouts"] or 0,
-                "total_unique_exercises": total_stats["total_unique_exercises"] or 0,
-                "total_sets": total_stats["total_sets"] or 0,
-                "total_volume": total_stats["total_volume"] or 0.0,
-                "avg_volume_per_workout": round(total_stats["avg_volume_per_workout"] or 0.0, 2)
-            }
+            response["summary"] = _history_summary(conn, type, date_from, date_to, template_id)
         
         return response
 
 
-@app.get("/workouts/{workout_id}", response_model=WorkoutResponse)
-async def get_workout(workout_id: int):
-    with get_conn() as conn:
-        workout = conn.execute(
-            """SELECT w.id, w.date, w.type, w.note, w.template_id, 
-                      t.name as template_name
-               FROM Workouts w
-               LEFT JOIN Templates t ON w.template_id = t.id
-               WHERE w.id = ?""",
-            (workout_id,)
-        ).fetchone()
+# Streamed straight off a database cursor, so memory use does not grow with
+# the size of the log. The cursor's connection stays checked out for the
+# whole download, hence the cap on concurrent exports.
+@app.get("/export")
+async def export_workouts(
+    request: Request,
+    format: str = Query("ndjson", description="Export format: ndjson or csv"),
+    date_from: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
+    date_to: Optional[str] = Query(None, description="End date (YYYY-MM-DD)")
+):
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+    if exports_running() >= EXPORT_MAX_CONCURRENT:
+        raise HTTPException(status_code=503, detail="Too many exports running, retry shortly", headers={"Retry-After": "5"})
+
+    compress = "gzip" in request.headers.get("accept-encoding", "")
+    headers = {"Content-Disposition": f'attachment; filename="workouts.{format}"', "Vary": "Accept-Encoding"}
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+
+    return StreamingResponse(
+        stream_export(format, date_from, date_to, compress),
+        media_type=EXPORT_FORMATS[format],
+        headers=headers
+    )
 
-        if not workout:
-            raise HTTPException(status_code=404, detail=f"Workout with id={workout_id} not found")
 
-        sets = conn.execute(
-            """SELECT s.id, s.workout_id, s.exercise_id, e.name as exercise_name,
-                      e.muscle_group, s.weight, s.reps, s.set_number
-               FROM Sets s
-               JOIN Exercises e ON s.exercise_id = e.id
-               WHERE s.workout_id = ?
-               ORDER BY s.set_number, s.id""",
-            (workout_id,)
-        ).fetchall()
+def _decode_import_body(body: bytes, content_encoding: str) -> str:
+    try:
+        if "gzip" in content_encoding:
+            body = gzip.decompress(body)
+        return body.decode("utf-8-sig")
+    except (OSError, EOFError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Request body must be UTF-8 text, optionally gzip-encoded")
+
+
+# Accepts the shape produced by /export. Exercises are matched by name and
+# created when missing; rows are written in chunked transactions.
+@app.post("/import")
+async def import_workouts(
+    request: Request,
+    format: Optional[str] = Query(None, description="ndjson or csv (default: from Content-Type)"),
+    dry_run: bool = Query(False, description="Validate and report without writing"),
+    chunk_size: int = Query(DEFAULT_CHUNK_SETS, ge=1, description="Sets written per transaction")
+):
+    if format is None:
+        content_type = request.headers.get("content-type", "")
+        format = "csv" if "csv" in content_type else "ndjson" if "json" in content_type else None
+    if format not in IMPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(IMPORT_FORMATS)}")
+
+    body = await request.body()
+    content_encoding = request.headers.get("content-encoding", "")
+    return await run_db(
+        lambda: import_log(_decode_import_body(body, content_encoding), format, dry_run, chunk_size)
+    )
+
+
+def _fetch_workout_response(conn: sqlite3.Connection, workout_id: int) -> Optional[WorkoutResponse]:
+    workout = conn.execute(
+        """SELECT w.id, w.date, w.type, w.note, w.template_id, 
+                  t.name as template_name
+           FROM Workouts w
+           LEFT JOIN Templates t ON w.template_id = t.id
+           WHERE w.id = ?""",
+        (workout_id,)
+    ).fetchone()
+
+    if not workout:
+        return None
+
+    sets = _set_responses(conn, conn.execute(
+        f"SELECT {SET_COLUMNS} FROM Sets WHERE workout_id = ? ORDER BY set_number, id",
+        (workout_id,)
+    ).fetchall())
 
     return WorkoutResponse(
         id=workout["id"],
@@ -883,24 +1168,40 @@ async def get_workout(workout_id: int):
         note=workout["note"],
         template_id=workout["template_id"],
         template_name=workout["template_name"],
-        sets=[
-            SetResponse(
-                id=s["id"],
-                workout_id=s["workout_id"],
-                exercise_id=s["exercise_id"],
-                exercise_name=s["exercise_name"],
-                muscle_group=s["muscle_group"],
-                weight=s["weight"],
-                reps=s["reps"],
-                set_number=s["set_number"]
-            )
-            for s in sets
-        ]
+        sets=[SetResponse(**s) for s in sets]
     )
 
 
+@app.get("/workouts/{workout_id}", response_model=WorkoutResponse)
+@db_handler
+def get_workout(workout_id: int):
+    key = f"workout:{workout_id}"
+    cached = response_cache.get(key)
+    if cached is not None:
+        return cached
+
+    generation = response_cache.generation()
+    with get_conn() as conn:
+        workout = _fetch_workout_response(conn, workout_id)
+
+    if not workout:
+        raise HTTPException(status_code=404, detail=f"Workout with id={workout_id} not found")
+
+    tags = {key, *(f"exercise:{s.exercise_id}" for s in workout.sets)}
+    if workout.template_id is not None:
+        tags.add(f"template:{workout.template_id}")
+    return response_cache.put(key, workout, tags, generation)
+
+
 @app.get("/exercises")
-async def list_exercises(muscle_group: str | None = None):
+@db_handler
+def list_exercises(muscle_group: str | None = None):
+    key = f"exercises:{muscle_group or ''}"
+    cached = response_cache.get(key)
+    if cached is not None:
+        return cached
+
+    generation = response_cache.generation()
     with get_conn() as conn:
         if muscle_group:
             rows = conn.execute(
@@ -911,11 +1212,12 @@ async def list_exercises(muscle_group: str | None = None):
             rows = conn.execute(
                 "SELECT id, name, muscle_group, note FROM Exercises ORDER BY muscle_group, name"
             ).fetchall()
-    return [dict(r) for r in rows]
+    return response_cache.put(key, [dict(r) for r in rows], ["exercises"], generation)
 
 
 @app.post("/workouts/{workout_id}/create-template", status_code=201)
-async def create_template_from_workout(
+@db_handler
+def create_template_from_workout(
     workout_id: int, 
     template_name: str = Query(..., min_length=1, description="Template name")
 ):
@@ -956,7 +1258,8 @@ async def create_template_from_workout(
 
 
 @app.get("/templates")
-async def list_templates():
+@db_handler
+def list_templates():
     with get_conn() as conn:
         rows = conn.execute(
             "SELECT id, name, type, note FROM Templates ORDER BY id DESC"
@@ -965,7 +1268,14 @@ async def list_templates():
 
 
 @app.get("/templates/{template_id}", response_model=TemplateResponse)
-async def get_template(template_id: int):
+@db_handler
+def get_template(template_id: int):
+    key = f"template:{template_id}"
+    cached = response_cache.get(key)
+    if cached is not None:
+        return cached
+
+    generation = response_cache.generation()
     with get_conn() as conn:
         template = conn.execute(
             "SELECT id, name, type, note FROM Templates WHERE id = ?",
@@ -985,7 +1295,7 @@ async def get_template(template_id: int):
             (template_id,)
         ).fetchall()
     
-    return TemplateResponse(
+    response = TemplateResponse(
         id=template["id"],
         name=template["name"],
         type=template["type"],
@@ -1004,10 +1314,13 @@ async def get_template(template_id: int):
             for s in sets
         ]
     )
+    tags = {key, *(f"exercise:{s.exercise_id}" for s in response.sets)}
+    return response_cache.put(key, response, tags, generation)
 
 
 @app.post("/templates/{template_id}/create-workout", status_code=201)
-async def create_workout_from_template(
+@db_handler
+def create_workout_from_template(
     template_id: int, 
     date: str = Query(..., min_length=1, description="Workout date")
 ):
@@ -1043,89 +1356,52 @@ async def create_workout_from_template(
                VALUES (?, ?, ?, ?, ?)""",
             workout_sets_data
         )
+        _apply_set_changes(conn, inserted=fetch_set_images(conn, "workout_id = ?", (workout_id,)))
+        refresh_daily_aggregates(conn, [(date, template["type"])])
     
     return {"id": workout_id, "message": f"Workout created from template '{template['type']}'"}
 
 
 @app.delete("/templates/{template_id}", status_code=204)
-async def delete_template(template_id: int):
+@db_handler
+def delete_template(template_id: int):
     with get_conn() as conn:
         cur = conn.execute("DELETE FROM Templates WHERE id = ?", (template_id,))
         if cur.rowcount == 0:
             raise HTTPException(status_code=404, detail="Template not found")
+        invalidate_on_commit(conn, [f"template:{template_id}"])
     return None
 
 
+# Both record routes read the bests kept in ExerciseRecords, so ties go to
+# the oldest set in each.
+_RECORD_SELECT = """
+    SELECT r.exercise_id, e.name as exercise_name, e.muscle_group,
+           r.max_weight, ww.date as max_weight_date, r.max_weight_workout_id,
+           r.max_reps, wr.date as max_reps_date, r.max_reps_workout_id, r.max_reps_weight,
+           r.max_volume, wv.date as max_volume_date, r.max_volume_workout_id,
+           r.total_sets, r.total_workouts
+    FROM ExerciseRecords r
+    JOIN Exercises e ON r.exercise_id = e.id
+    LEFT JOIN Workouts ww ON r.max_weight_workout_id = ww.id
+    LEFT JOIN Workouts wr ON r.max_reps_workout_id = wr.id
+    LEFT JOIN Workouts wv ON r.max_volume_workout_id = wv.id
+"""
+
+
 @app.get("/records")
-async def get_all_records(
+@db_handler
+def get_all_records(
     sort_by: Optional[str] = Query("name", description="Sort by: name, max_weight, max_reps, max_volume, muscle_group")
 ):
     with get_conn() as conn:
-        exercises = conn.execute("""
-            SELECT id, name, muscle_group
-            FROM Exercises
-            ORDER BY muscle_group, name
+        rows = conn.execute(f"""
+            {_RECORD_SELECT}
+            WHERE r.total_sets > 0
+            ORDER BY e.muscle_group, e.name
         """).fetchall()
         
-        records = []
-        for exercise in exercises:
-            exercise_id = exercise["id"]
-            
-            max_weight_data = conn.execute("""
-                SELECT s.weight, w.date, w.id as workout_id
-                FROM Sets s
-                JOIN Workouts w ON s.workout_id = w.id
-                WHERE s.exercise_id = ?
-                ORDER BY s.weight DESC, s.reps ASC
-                LIMIT 1
-            """, (exercise_id,)).fetchone()
-            
-            max_reps_data = conn.execute("""
-                SELECT s.reps, s.weight, w.date, w.id as workout_id
-                FROM Sets s
-                JOIN Workouts w ON s.workout_id = w.id
-                WHERE s.exercise_id = ?
-                ORDER BY s.reps DESC, s.weight DESC
-                LIMIT 1
-            """, (exercise_id,)).fetchone()
-            
-            max_volume_data = conn.execute("""
-                SELECT s.weight * s.reps as volume, s.weight, s.reps, w.date, w.id as workout_id
-                FROM Sets s
-                JOIN Workouts w ON s.workout_id = w.id
-                WHERE s.exercise_id = ?
-                ORDER BY (s.weight * s.reps) DESC
-                LIMIT 1
-            """, (exercise_id,)).fetchone()
-            
-            stats = conn.execute("""
-                SELECT 
-                    COUNT(s.id) as total_sets,
-                    COUNT(DISTINCT s.workout_id) as total_workouts
-                FROM Sets s
-                WHERE s.exercise_id = ?
-            """, (exercise_id,)).fetchone()
-            
-            record = ExerciseRecord(
-                exercise_id=exercise_id,
-                exercise_name=exercise["name"],
-                muscle_group=exercise["muscle_group"],
-                max_weight=max_weight_data["weight"] if max_weight_data else None,
-                max_weight_date=max_weight_data["date"] if max_weight_data else None,
-                max_weight_workout_id=max_weight_data["workout_id"] if max_weight_data else None,
-                max_reps=max_reps_data["reps"] if max_reps_data else None,
-                max_reps_date=max_reps_data["date"] if max_reps_data else None,
-                max_reps_workout_id=max_reps_data["workout_id"] if max_reps_data else None,
-                max_reps_weight=max_reps_data["weight"] if max_reps_data else None,
-                max_volume=max_volume_data["volume"] if max_volume_data else None,
-                max_volume_date=max_volume_data["date"] if max_volume_data else None,
-                max_volume_workout_id=max_volume_data["workout_id"] if max_volume_data else None,
-                total_sets=stats["total_sets"] or 0,
-                total_workouts=stats["total_workouts"] or 0
-            )
-            
-            if record.max_weight is not None or record.max_reps is not None or record.max_volume is not None:
-                records.append(record)
+        records = [ExerciseRecord(**dict(row)) for row in rows]
         
         if sort_by == "max_weight":
             records.sort(key=lambda x: x.max_weight if x.max_weight else 0, reverse=True)
@@ -1145,48 +1421,41 @@ async def get_all_records(
     }
 
 
+@app.post("/records/rebuild")
+@db_handler
+def rebuild_all_records():
+    with get_conn() as conn:
+        rebuilt = rebuild_records(conn)
+        on_commit(conn, response_cache.clear)
+    return {"rebuilt": rebuilt}
+
+
 @app.get("/records/{exercise_id}")
-async def get_exercise_record(exercise_id: int):
+@db_handler
+def get_exercise_record(exercise_id: int):
+    key = f"record:{exercise_id}"
+    cached = response_cache.get(key)
+    if cached is not None:
+        return cached
+
+    generation = response_cache.generation()
     with get_conn() as conn:
-        exercise = conn.execute(
-            "SELECT id, name, muscle_group FROM Exercises WHERE id = ?",
-            (exercise_id,)
-        ).fetchone()
-        
-        if not exercise:
-            raise HTTPException(status_code=404, detail=f"Exercise with id={exercise_id} not found")
+        exercise = _require_exercises(conn, [exercise_id])[exercise_id]
         
-        max_weight_data = conn.execute("""
-            SELECT s.weight, w.date, w.id as workout_id
-            FROM Sets s
-            JOIN Workouts w ON s.workout_id = w.id
-            WHERE s.exercise_id = ?
-            ORDER BY s.weight DESC, s.reps ASC
-            LIMIT 1
-        """, (exercise_id,)).fetchone()
-        
-        max_reps_data = conn.execute("""
-            SELECT s.reps, s.weight, w.date, w.id as workout_id
-            FROM Sets s
-            JOIN Workouts w ON s.workout_id = w.id
-            WHERE s.exercise_id = ?
-            ORDER BY s.reps DESC, s.weight DESC
-            LIMIT 1
-        """, (exercise_id,)).fetchone()
-        
-        max_volume_data = conn.execute("""
-            SELECT s.weight * s.reps as volume, s.weight, s.reps, w.date, w.id as workout_id
-            FROM Sets s
-            JOIN Workouts w ON s.workout_id = w.id
-            WHERE s.exercise_id = ?
-            ORDER BY (s.weight * s.reps) DESC
-            LIMIT 1
-        """, (exercise_id,)).fetchone()
+        row = conn.execute(f"{_RECORD_SELECT} WHERE r.exercise_id = ?", (exercise_id,)).fetchone()
+        if row is not None:
+            record = ExerciseRecord(**dict(row))
+        else:
+            record = ExerciseRecord(
+                exercise_id=exercise_id,
+                exercise_name=exercise["name"],
+                muscle_group=exercise["muscle_group"],
+                total_sets=0,
+                total_workouts=0
+            )
         
         stats = conn.execute("""
             SELECT 
-                COUNT(s.id) as total_sets,
-                COUNT(DISTINCT s.workout_id) as total_workouts,
                 AVG(s.weight) as avg_weight,
                 MAX(s.weight) as max_weight_value,
                 AVG(s.reps) as avg_reps,
@@ -1201,7 +1470,7 @@ async def get_exercise_record(exercise_id: int):
             FROM Sets s
             JOIN Workouts w ON s.workout_id = w.id
             WHERE s.exercise_id = ?
-            ORDER BY s.weight DESC, s.reps ASC
+            ORDER BY s.weight DESC, s.reps ASC, s.id ASC
             LIMIT 10
         """, (exercise_id,)).fetchall()
         
@@ -1210,29 +1479,11 @@ async def get_exercise_record(exercise_id: int):
             FROM Sets s
             JOIN Workouts w ON s.workout_id = w.id
             WHERE s.exercise_id = ?
-            ORDER BY (s.weight * s.reps) DESC
+            ORDER BY (s.weight * s.reps) DESC, s.id ASC
             LIMIT 10
         """, (exercise_id,)).fetchall()
         
-        record = ExerciseRecord(
-            exercise_id=exercise_id,
-            exercise_name=exercise["name"],
-            muscle_group=exercise["muscle_group"],
-            max_weight=max_weight_data["weight"] if max_weight_data else None,
-            max_weight_date=max_weight_data["date"] if max_weight_data else None,
-            max_weight_workout_id=max_weight_data["workout_id"] if max_weight_data else None,
-            max_reps=max_reps_data["reps"] if max_reps_data else None,
-            max_reps_date=max_reps_data["date"] if max_reps_data else None,
-            max_reps_workout_id=max_reps_data["workout_id"] if max_reps_data else None,
-            max_reps_weight=max_reps_data["weight"] if max_reps_data else None,
-            max_volume=max_volume_data["volume"] if max_volume_data else None,
-            max_volume_date=max_volume_data["date"] if max_volume_data else None,
-            max_volume_workout_id=max_volume_data["workout_id"] if max_volume_data else None,
-            total_sets=stats["total_sets"] or 0,
-            total_workouts=stats["total_workouts"] or 0
-        )
-        
-        return {
+        result = {
             "record": record,
             "statistics": {
                 "avg_weight": round(stats["avg_weight"] or 0.0, 2),
@@ -1244,3 +1495,201 @@ async def get_exercise_record(exercise_id: int):
             "top_weight": [dict(t) for t in top_weight],
             "top_volume": [dict(t) for t in top_volume]
         }
+
+    return response_cache.put(key, result, [key, f"exercise:{exercise_id}"], generation)
+
+
+ANALYTICS_PERIODS = ("week", "month")
+ANALYTICS_GROUPS = ("exercise", "muscle_group")
+
+
+def _analytics_scope(
+    exercises: dict[int, dict],
+    exercise_id: Optional[int],
+    muscle_group: Optional[str],
+    date_from: Optional[str],
+    date_to: Optional[str]
+) -> Optional[np.ndarray]:
+    for value in (date_from, date_to):
+        if value:
+            try:
+                day_number(value)
+            except ValueError:
+                raise HTTPException(status_code=400, detail=f"Invalid date: {value}")
+
+    if exercise_id is not None:
+        if exercise_id not in exercises:
+            raise HTTPException(status_code=404, detail=f"Exercise with id={exercise_id} not found")
+        return np.array([exercise_id])
+    if muscle_group:
+        return np.array([e["id"] for e in exercises.values() if e["muscle_group"] == muscle_group])
+    return None
+
+
+# Served from the columnar Sets snapshot in analytics.py: one vectorized
+# pass instead of a query per bucket. The payloads are plain lists of
+# numbers, so they skip jsonable_encoder and go out as JSONResponse.
+@app.get("/analytics/volume")
+@db_handler
+def get_volume_by_period(
+    period: str = Query("week", description="Bucket size: week or month"),
+    group_by: str = Query("exercise", description="Group by: exercise or muscle_group"),
+    exercise_id: Optional[int] = Query(None, description="Only this exercise"),
+    muscle_group: Optional[str] = Query(None, description="Only exercises of this muscle group"),
+    date_from: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
+    date_to: Optional[str] = Query(None, description="End date (YYYY-MM-DD)")
+):
+    if period not in ANALYTICS_PERIODS:
+        raise HTTPException(status_code=400, detail=f"period must be one of: {', '.join(ANALYTICS_PERIODS)}")
+    if group_by not in ANALYTICS_GROUPS:
+        raise HTTPException(status_code=400, detail=f"group_by must be one of: {', '.join(ANALYTICS_GROUPS)}")
+
+    with get_conn() as conn:
+        rows = set_columns.refresh(conn)
+        exercises = exercise_catalog.snapshot(conn)
+    scope = _analytics_scope(exercises, exercise_id, muscle_group, date_from, date_to)
+
+    size = max(max(exercises, default=0), int(rows.exercise_id.max()) if rows.size else 0) + 1
+    if group_by == "exercise":
+        keys = np.arange(size)
+    else:
+        groups = sorted({e["muscle_group"] for e in exercises.values()})
+        index = {g: i for i, g in enumerate(groups)}
+        keys = np.zeros(size, dtype=np.int64)
+        for e in exercises.values():
+            keys[e["id"]] = index[e["muscle_group"]]
+
+    buckets = []
+    for start, key, sets, volume in volume_by_period(rows, period, keys, scope, date_from, date_to):
+        bucket = {"period_start": day_string(start)}
+        if group_by == "exercise":
+            exercise = exercises.get(key)
+            bucket.update(exercise_id=key, exercise_name=exercise["name"] if exercise else None)
+        else:
+            bucket["muscle_group"] = groups[key]
+        bucket.update(sets=sets, volume=round(volume, 2))
+        buckets.append(bucket)
+
+    return JSONResponse({"period": period, "group_by": group_by, "buckets": buckets})
+
+
+@app.get("/analytics/rolling")
+@db_handler
+def get_rolling_volume(
+    window: int = Query(7, ge=1, le=365, description="Rolling window in days"),
+    exercise_id: Optional[int] = Query(None, description="Only this exercise"),
+    muscle_group: Optional[str] = Query(None, description="Only exercises of this muscle group"),
+    date_from: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
+    date_to: Optional[str] = Query(None, description="End date (YYYY-MM-DD)")
+):
+    with get_conn() as conn:
+        rows = set_columns.refresh(conn)
+        exercises = exercise_catalog.snapshot(conn)
+    scope = _analytics_scope(exercises, exercise_id, muscle_group, date_from, date_to)
+
+    return JSONResponse({
+        "window": window,
+        "points": [
+            {"date": day_string(day), "volume": round(volume, 2), "rolling_avg": round(avg, 2)}
+            for day, volume, avg in rolling_volume(rows, window, scope, date_from, date_to)
+        ]
+    })
+
+
+# Charts of several years of sessions are thinned with LTTB, which keeps
+# the peaks and dips of the e1RM curve that plain striding would drop.
+@app.get("/records/{exercise_id}/progression")
+@db_handler
+def get_exercise_progression(
+    exercise_id: int,
+    formula: str = Query("epley", description="Estimated 1RM formula: epley or brzycki"),
+    points: Optional[int] = Query(None, ge=3, le=5000, description="Downsample to at most this many sessions"),
+    date_from: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
+    date_to: Optional[str] = Query(None, description="End date (YYYY-MM-DD)")
+):
+    if formula not in E1RM_FORMULAS:
+        raise HTTPException(status_code=400, detail=f"formula must be one of: {', '.join(E1RM_FORMULAS)}")
+
+    with get_conn() as conn:
+        rows = set_columns.refresh(conn)
+        exercises = exercise_catalog.snapshot(conn, expect=[exercise_id])
+    _analytics_scope(exercises, exercise_id, None, date_from, date_to)
+
+    sessions = session_progression(rows, exercise_id, formula, date_from, date_to)
+    total = len(sessions["day"])
+    if points is not None:
+        kept = lttb(sessions["day"].astype(np.float64), sessions["e1rm"], points)
+        sessions = {name: values[kept] for name, values in sessions.items()}
+
+    return JSONResponse({
+        "exercise_id": exercise_id,
+        "exercise_name": exercises[exercise_id]["name"],
+        "formula": formula,
+        "sessions": total,
+        "downsampled": len(sessions["day"]) < total,
+        "points": [
+            {
+                "date": day_string(day),
+                "workout_id": workout_id,
+                "e1rm": round(e1rm, 2),
+                "best_set": {"weight": weight, "reps": reps},
+                "volume": round(volume, 2),
+                "sets": sets,
+            }
+            for day, workout_id, e1rm, weight, reps, volume, sets in zip(*(v.tolist() for v in sessions.values()))
+        ]
+    })
+
+
+@app.get("/analytics/muscle-volume")
+@db_handler
+def get_muscle_volume(weeks: int = Query(12, ge=1, le=520, description="Number of weeks, ending with the current one")):
+    with get_conn() as conn:
+        exercises = exercise_catalog.snapshot(conn)
+        matrix = muscle_volume.weeks(conn, weeks)
+
+    groups = sorted({e["muscle_group"] for e in exercises.values()}.union(*(cells for _, cells in matrix)))
+    return JSONResponse({
+        "weeks": [week for week, _ in matrix],
+        "muscle_groups": groups,
+        "sets": [[cells.get(g, (0, 0))[0] for g in groups] for _, cells in matrix],
+        "volume": [[round(cells.get(g, (0, 0))[1], 2) for g in groups] for _, cells in matrix],
+    })
+
+
+@app.get("/search")
+@db_handler
+def search(
+    q: str = Query(..., min_length=1, description="Words to find in workout, exercise and template notes"),
+    sources: Optional[str] = Query(None, description="Comma-separated subset of: workout, exercise, template"),
+    type: Optional[str] = Query(None, description="Workout or template type"),
+    date_from: Optional[str] = Query(None, description="Start date (YYYY-MM-DD), workouts only"),
+    date_to: Optional[str] = Query(None, description="End date (YYYY-MM-DD), workouts only"),
+    limit: int = Query(20, ge=1, le=100),
+    window: Optional[int] = Query(
+        None, ge=1, le=100000,
+        description="Rank only the newest N matches per source: faster for very common words, but older notes are never returned"
+    )
+):
+    selected = SEARCH_SOURCES
+    if sources:
+        selected = tuple(s.strip() for s in sources.split(",") if s.strip())
+        unknown = [s for s in selected if s not in SEARCH_SOURCES]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"sources must be among: {', '.join(SEARCH_SOURCES)}")
+
+    with get_conn() as conn:
+        results = search_notes(conn, q, selected, type, date_from, date_to, limit, window)
+
+    return {"query": q, "results": results}
+
+
+@app.get("/exercises/suggest")
+@db_handler
+def suggest_exercises(
+    prefix: str = Query("", description="Start of the exercise name or of any word in it"),
+    limit: int = Query(10, ge=1, le=50),
+    muscle_group: Optional[str] = Query(None, description="Only exercises of this muscle group")
+):
+    with get_conn() as conn:
+        return exercise_suggestions.suggest(conn, prefix, limit, muscle_group)
@@ -0,0 +1,131 @@
+import bisect
+from typing import Iterable
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+WAIT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+# Requests that matched no route share one label, so scanners probing
+# random paths cannot grow the series without bound.
+UNMATCHED_ROUTE = "unmatched"
+
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: tuple[float, ...]):
+        self.bounds = bounds
+        # One slot per bucket plus +Inf; made cumulative only when rendered.
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _family(name: str, kind: str, help: str, samples: Iterable[tuple[dict, float]]) -> list[str]:
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+    lines += [f"{name}{_labels(labels)} {value}" for labels, value in samples]
+    return lines
+
+
+def _histogram_family(name: str, help: str, histograms: dict[tuple, Histogram], label_names: tuple[str, ...]) -> list[str]:
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} histogram"]
+    for key, histogram in sorted(histograms.items()):
+        labels = dict(zip(label_names, key))
+        total = 0
+        for bound, count in zip((*histogram.bounds, "+Inf"), histogram.counts):
+            total += count
+            lines.append(f"{name}_bucket{_labels({**labels, 'le': bound})} {total}")
+        lines.append(f"{name}_sum{_labels(labels)} {histogram.sum}")
+        lines.append(f"{name}_count{_labels(labels)} {total}")
+    return lines
+
+
+class RequestMetrics:
+    # Only the event loop thread records and renders, so plain counters
+    # need no lock and recording a request stays at a few dict updates.
+    def __init__(self):
+        self.in_flight = 0
+        self._requests: dict[tuple[str, str, int], int] = {}
+        self._latency: dict[tuple[str, str], Histogram] = {}
+        self._db_seconds: dict[tuple[str, str], float] = {}
+        self._queries: dict[tuple[str, str], int] = {}
+        self._pool_wait = Histogram(WAIT_BUCKETS)
+
+    def started(self) -> None:
+        self.in_flight += 1
+
+    def responded(self) -> None:
+        self.in_flight -= 1
+
+    def finished(self, method: str, route: str, status: int, seconds: float, stats) -> None:
+        key = (method, route)
+        counted = (method, route, status)
+        self._requests[counted] = self._requests.get(counted, 0) + 1
+        histogram = self._latency.get(key)
+        if histogram is None:
+            histogram = self._latency[key] = Histogram(LATENCY_BUCKETS)
+        histogram.observe(seconds)
+        self._db_seconds[key] = self._db_seconds.get(key, 0.0) + stats.db_seconds
+        self._queries[key] = self._queries.get(key, 0) + stats.queries
+        self._pool_wait.observe(stats.wait_seconds)
+
+    def render(self) -> list[str]:
+        lines = _family(
+            "workout_http_requests_total", "counter", "Requests by route template and status.",
+            (({"method": m, "route": r, "status": s}, n) for (m, r, s), n in sorted(self._requests.items()))
+        )
+        lines += _histogram_family(
+            "workout_http_request_duration_seconds", "Time from request to last body byte.",
+            self._latency, ("method", "route")
+        )
+        lines += _family("workout_http_requests_in_flight", "gauge", "Requests whose response has not started.", [({}, self.in_flight)])
+        lines += _family(
+            "workout_db_seconds_total", "counter", "Time requests held a database connection.",
+            (({"method": m, "route": r}, s) for (m, r), s in sorted(self._db_seconds.items()))
+        )
+        lines += _family(
+            "workout_db_queries_total", "counter", "SQL statements run by requests.",
+            (({"method": m, "route": r}, n) for (m, r), n in sorted(self._queries.items()))
+        )
+        lines += _histogram_family(
+            "workout_db_pool_wait_seconds", "Time a request waited for pool connections.",
+            {(): self._pool_wait}, ()
+        )
+        return lines
+
+
+request_metrics = RequestMetrics()
+
+
+def render_metrics(pool: dict, cache: dict) -> str:
+    lines = request_metrics.render()
+    lines += _family(
+        "workout_db_pool_connections", "gauge", "Open pool connections by state.",
+        [({"state": "in_use"}, pool["in_use"]), ({"state": "idle"}, pool["idle"])]
+    )
+    lines += _family("workout_db_pool_size", "gauge", "Maximum pool connections.", [({}, pool["size"])])
+    lines += _family("workout_db_pool_checkouts_total", "counter", "Connections handed out.", [({}, pool["checkouts"])])
+    lines += _family(
+        "workout_db_pool_timeouts_total", "counter", "Checkouts that gave up waiting.", [({}, pool["timeouts"])]
+    )
+    for name in ("hits", "misses", "evictions", "expirations", "invalidations"):
+        lines += _family(
+            f"workout_cache_{name}_total", "counter", f"Response cache {name}.", [({}, cache[name])]
+        )
+    lines += _family("workout_cache_entries", "gauge", "Responses held in the cache.", [({}, cache["entries"])])
+    lines += _family("workout_cache_bytes", "gauge", "Bytes held in the cache.", [({}, cache["bytes"])])
+    return "\n".join(lines) + "\n"
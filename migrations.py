@@ -0,0 +1,291 @@
+import sqlite3
+from typing import Callable
+
+from records import RECORDS_DDL, rebuild_records
+from rollups import ROLLUPS_DDL, WEEK_CHANGES_DDL, rebuild_daily_aggregates
+from search import SEARCH_DDL
+
+DEFAULT_EXERCISES = [
+    ("Bench Press", "Chest"),
+    ("Incline Dumbbell Press", "Chest"),
+    ("Dumbbell Fly", "Chest"),
+    ("Push-Up", "Chest"),
+    ("Cable Crossover", "Chest"),
+    ("Pull-Up", "Back"),
+    ("Lat Pulldown", "Back"),
+    ("Barbell Row", "Back"),
+    ("Seated Cable Row", "Back"),
+    ("Deadlift", "Back"),
+    ("Back Squat", "Legs"),
+    ("Leg Press", "Legs"),
+    ("Romanian Deadlift", "Legs"),
+    ("Leg Extension", "Legs"),
+    ("Leg Curl", "Legs"),
+    ("Calf Raise", "Legs"),
+    ("Overhead Press", "Shoulders"),
+    ("Dumbbell Lateral Raise", "Shoulders"),
+    ("Front Raise", "Shoulders"),
+    ("Face Pull", "Shoulders"),
+    ("Barbell Curl", "Biceps"),
+    ("Dumbbell Curl", "Biceps"),
+    ("Hammer Curl", "Biceps"),
+    ("Tricep Pushdown", "Triceps"),
+    ("Skull Crushers", "Triceps"),
+    ("Dips", "Triceps"),
+    ("Plank", "Core"),
+    ("Crunches", "Core"),
+    ("Russian Twist", "Core"),
+    ("Hanging Leg Raise", "Core"),
+    ("Burpees", "Full Body"),
+]
+
+
+def execute_script(conn: sqlite3.Connection, script: str) -> None:
+    # Unlike executescript() this does not COMMIT first, so the statements
+    # stay inside the migration's transaction. Trigger bodies are kept whole.
+    statement = ""
+    for line in script.splitlines(keepends=True):
+        statement += line
+        if sqlite3.complete_statement(statement):
+            conn.execute(statement)
+            statement = ""
+    if statement.strip():
+        conn.execute(statement)
+
+
+def _column_exists(conn: sqlite3.Connection, table: str, column: str) -> bool:
+    rows = conn.execute(f"PRAGMA table_info({table})").fetchall()
+    return any(r[1] == column for r in rows)  # r[1] = name
+
+
+def _add_column_if_missing(conn: sqlite3.Connection, table: str, column: str, col_def: str) -> None:
+    if not _column_exists(conn, table, column):
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {col_def}")
+
+
+def _base_schema(conn: sqlite3.Connection) -> None:
+    execute_script(conn, """
+    CREATE TABLE IF NOT EXISTS Workouts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        date TEXT NOT NULL,
+        type TEXT NOT NULL,
+        note TEXT
+    );
+
+    CREATE TABLE IF NOT EXISTS Exercises (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL UNIQUE,
+        muscle_group TEXT NOT NULL,
+        note TEXT
+    );
+
+    CREATE TABLE IF NOT EXISTS Sets (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        workout_id INTEGER NOT NULL,
+        exercise_id INTEGER NOT NULL,
+        weight REAL NOT NULL CHECK(weight >= 0),
+        reps INTEGER NOT NULL CHECK(reps > 0),
+        set_number INTEGER NULL,
+        FOREIGN KEY (workout_id) REFERENCES Workouts(id) ON DELETE CASCADE,
+        FOREIGN KEY (exercise_id) REFERENCES Exercises(id) ON DELETE RESTRICT
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_sets_workout_id ON Sets(workout_id);
+    CREATE INDEX IF NOT EXISTS idx_sets_exercise_id ON Sets(exercise_id);
+
+    CREATE TABLE IF NOT EXISTS Templates (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        type TEXT NOT NULL,
+        note TEXT
+    );
+
+    CREATE TABLE IF NOT EXISTS TemplateSets (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        template_id INTEGER NOT NULL,
+        exercise_id INTEGER NOT NULL,
+        weight REAL NOT NULL CHECK(weight >= 0),
+        reps INTEGER NOT NULL CHECK(reps > 0),
+        set_number INTEGER NULL,
+        FOREIGN KEY (template_id) REFERENCES Templates(id) ON DELETE CASCADE,
+        FOREIGN KEY (exercise_id) REFERENCES Exercises(id) ON DELETE RESTRICT
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_template_sets_template_id ON TemplateSets(template_id);
+    CREATE INDEX IF NOT EXISTS idx_template_sets_exercise_id ON TemplateSets(exercise_id);
+    """)
+
+    # Databases created before these columns existed.
+    _add_column_if_missing(conn, "Workouts", "note", "TEXT")
+    _add_column_if_missing(conn, "Exercises", "note", "TEXT")
+    _add_column_if_missing(conn, "Workouts", "template_id", "INTEGER")
+
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_workouts_template_id ON Workouts(template_id)")
+
+
+def _seed_exercises(conn: sqlite3.Connection) -> None:
+    count = conn.execute("SELECT COUNT(*) AS c FROM Exercises").fetchone()[0]
+    if count > 0:
+        return
+
+    conn.executemany(
+        "INSERT INTO Exercises (name, muscle_group) VALUES (?, ?)",
+        DEFAULT_EXERCISES
+    )
+
+
+def _exercise_records(conn: sqlite3.Connection) -> None:
+    execute_script(conn, RECORDS_DDL)
+    rebuild_records(conn)
+
+
+def _workouts_date_index(conn: sqlite3.Connection) -> None:
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_workouts_date_id ON Workouts(date, id)")
+
+
+def _hot_path_indexes(conn: sqlite3.Connection) -> None:
+    # Each index serves its ORDER BY with a backward scan, so record and
+    # history queries read rows in order instead of sorting them; the
+    # trailing columns make the record lookups covering.
+    execute_script(conn, """
+    CREATE INDEX IF NOT EXISTS idx_sets_exercise_weight ON Sets(exercise_id, weight, reps DESC, workout_id);
+    CREATE INDEX IF NOT EXISTS idx_sets_exercise_reps ON Sets(exercise_id, reps, weight, workout_id);
+    CREATE INDEX IF NOT EXISTS idx_sets_exercise_volume ON Sets(exercise_id, (weight * reps), weight, reps, workout_id);
+    CREATE INDEX IF NOT EXISTS idx_sets_workout_set_number ON Sets(workout_id, set_number);
+    CREATE INDEX IF NOT EXISTS idx_workouts_type_date ON Workouts(type, date);
+    CREATE INDEX IF NOT EXISTS idx_exercises_muscle_group_name ON Exercises(muscle_group, name);
+
+    DROP INDEX IF EXISTS idx_sets_workout_id;
+    DROP INDEX IF EXISTS idx_sets_exercise_id;
+    """)
+
+
+def _daily_rollups(conn: sqlite3.Connection) -> None:
+    execute_script(conn, ROLLUPS_DDL)
+    rebuild_daily_aggregates(conn)
+
+
+def _data_version(conn: sqlite3.Connection) -> None:
+    execute_script(conn, """
+    CREATE TABLE IF NOT EXISTS DataVersion (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        version INTEGER NOT NULL,
+        updated_at INTEGER NOT NULL
+    );
+
+    INSERT OR IGNORE INTO DataVersion (id, version, updated_at) VALUES (1, 1, CAST(strftime('%s', 'now') AS INTEGER));
+    """)
+
+
+def _catalog_version(conn: sqlite3.Connection) -> None:
+    _add_column_if_missing(conn, "DataVersion", "catalog_version", "INTEGER NOT NULL DEFAULT 1")
+
+
+def _sets_epoch(conn: sqlite3.Connection) -> None:
+    # Appends are picked up by id; anything that rewrites an existing set or
+    # moves it to another day bumps sets_epoch instead.
+    _add_column_if_missing(conn, "DataVersion", "sets_epoch", "INTEGER NOT NULL DEFAULT 1")
+    execute_script(conn, """
+    CREATE TRIGGER IF NOT EXISTS trg_sets_update_epoch
+    AFTER UPDATE OF workout_id, exercise_id, weight, reps ON Sets
+    WHEN OLD.workout_id IS NOT NEW.workout_id OR OLD.exercise_id IS NOT NEW.exercise_id
+      OR OLD.weight IS NOT NEW.weight OR OLD.reps IS NOT NEW.reps
+    BEGIN
+        UPDATE DataVersion SET sets_epoch = sets_epoch + 1;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_sets_delete_epoch
+    AFTER DELETE ON Sets
+    BEGIN
+        UPDATE DataVersion SET sets_epoch = sets_epoch + 1;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_workouts_date_epoch
+    AFTER UPDATE OF date ON Workouts
+    WHEN OLD.date IS NOT NEW.date
+    BEGIN
+        UPDATE DataVersion SET sets_epoch = sets_epoch + 1;
+    END;
+    """)
+
+
+def _week_changes(conn: sqlite3.Connection) -> None:
+    execute_script(conn, WEEK_CHANGES_DDL)
+
+
+def _note_search(conn: sqlite3.Connection) -> None:
+    execute_script(conn, SEARCH_DDL)
+
+
+def _history_totals_indexes(conn: sqlite3.Connection) -> None:
+    # The first covers the per-workout counts and volume of the history
+    # listing, COUNT(DISTINCT exercise_id) included; the second lets the
+    # history summary count distinct exercises in index order.
+    execute_script(conn, """
+    CREATE INDEX IF NOT EXISTS idx_sets_workout_totals ON Sets(workout_id, exercise_id, weight, reps);
+    CREATE INDEX IF NOT EXISTS idx_daily_exercises_exercise ON DailyExercises(exercise_id, type, date);
+    """)
+
+
+
+def _record_tiebreak_indexes(conn: sqlite3.Connection) -> None:
+    # Ties between equal sets go to the oldest one; with id DESC in the
+    # index the backward scan that serves ORDER BY ... DESC, id ASC still
+    # needs no sort.
+    execute_script(conn, """
+    DROP INDEX IF EXISTS idx_sets_exercise_weight;
+    DROP INDEX IF EXISTS idx_sets_exercise_volume;
+    CREATE INDEX idx_sets_exercise_weight ON Sets(exercise_id, weight, reps DESC, id DESC, workout_id);
+    CREATE INDEX idx_sets_exercise_volume ON Sets(exercise_id, (weight * reps), id DESC, weight, reps, workout_id);
+    """)
+
+
+# Append only: a database at version N has run every step up to N.
+MIGRATIONS: list[tuple[int, str, Callable[[sqlite3.Connection], None]]] = [
+    (1, "base schema", _base_schema),
+    (2, "seed default exercises", _seed_exercises),
+    (3, "exercise records", _exercise_records),
+    (4, "workouts (date, id) index", _workouts_date_index),
+    (5, "hot path indexes", _hot_path_indexes),
+    (6, "daily rollups", _daily_rollups),
+    (7, "data version", _data_version),
+    (8, "exercise catalog version", _catalog_version),
+    (9, "sets epoch triggers", _sets_epoch),
+    (10, "week change log", _week_changes),
+    (11, "note search", _note_search),
+    (12, "history totals indexes", _history_totals_indexes),
+    (13, "record tiebreak indexes", _record_tiebreak_indexes),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def pending(conn: sqlite3.Connection) -> list[tuple[int, str]]:
+    version = current_version(conn)
+    return [(target, name) for target, name, _ in MIGRATIONS if target > version]
+
+
+def migrate(conn: sqlite3.Connection) -> list[tuple[int, str]]:
+    if current_version(conn) >= LATEST_VERSION:
+        return []
+
+    applied = []
+    for target, name, step in MIGRATIONS:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Re-read under the write lock: another worker may have migrated.
+            if current_version(conn) >= target:
+                conn.rollback()
+                continue
+            step(conn)
+            conn.execute(f"PRAGMA user_version = {target}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        applied.append((target, name))
+    return applied
@@ -0,0 +1,193 @@
+import sqlite3
+from typing import Iterable, Optional
+
+RECORDS_DDL = """
+CREATE TABLE IF NOT EXISTS ExerciseRecords (
+    exercise_id INTEGER PRIMARY KEY,
+    max_weight_set_id INTEGER,
+    max_weight_workout_id INTEGER,
+    max_weight REAL,
+    max_weight_reps INTEGER,
+    max_reps_set_id INTEGER,
+    max_reps_workout_id INTEGER,
+    max_reps INTEGER,
+    max_reps_weight REAL,
+    max_volume_set_id INTEGER,
+    max_volume_workout_id INTEGER,
+    max_volume REAL,
+    total_sets INTEGER NOT NULL DEFAULT 0,
+    total_workouts INTEGER NOT NULL DEFAULT 0,
+    FOREIGN KEY (exercise_id) REFERENCES Exercises(id) ON DELETE CASCADE
+);
+"""
+
+SET_IMAGE_COLUMNS = "id, workout_id, exercise_id, weight, reps"
+
+_RECORD_COLUMNS = (
+    "max_weight_set_id", "max_weight_workout_id", "max_weight", "max_weight_reps",
+    "max_reps_set_id", "max_reps_workout_id", "max_reps", "max_reps_weight",
+    "max_volume_set_id", "max_volume_workout_id", "max_volume",
+)
+
+
+def _in_clause(values: Iterable) -> tuple[str, list]:
+    values = list(values)
+    return ", ".join("?" for _ in values), values
+
+
+def rebuild_records(conn: sqlite3.Connection, exercise_ids: Optional[Iterable[int]] = None) -> int:
+    set_filter = ""
+    exercise_filter = ""
+    params: list = []
+    if exercise_ids is not None:
+        placeholders, ids = _in_clause(exercise_ids)
+        if not ids:
+            return 0
+        set_filter = f"WHERE exercise_id IN ({placeholders})"
+        exercise_filter = f"WHERE e.id IN ({placeholders})"
+        params = ids * 4 + ids
+
+    changes_before = conn.total_changes
+    conn.execute(f"""
+        WITH counts AS (
+            SELECT exercise_id, COUNT(*) as total_sets, COUNT(DISTINCT workout_id) as total_workouts
+            FROM Sets {set_filter}
+            GROUP BY exercise_id
+        ),
+        by_weight AS (
+            SELECT exercise_id, id, workout_id, weight, reps,
+                   ROW_NUMBER() OVER (PARTITION BY exercise_id ORDER BY weight DESC, reps ASC, id) as rn
+            FROM Sets {set_filter}
+        ),
+        by_reps AS (
+            SELECT exercise_id, id, workout_id, weight, reps,
+                   ROW_NUMBER() OVER (PARTITION BY exercise_id ORDER BY reps DESC, weight DESC, id) as rn
+            FROM Sets {set_filter}
+        ),
+        by_volume AS (
+            SELECT exercise_id, id, workout_id, weight * reps as volume,
+                   ROW_NUMBER() OVER (PARTITION BY exercise_id ORDER BY weight * reps DESC, id) as rn
+            FROM Sets {set_filter}
+        )
+        INSERT OR REPLACE INTO ExerciseRecords (
+            exercise_id, {", ".join(_RECORD_COLUMNS)}, total_sets, total_workouts
+        )
+        SELECT e.id,
+               bw.id, bw.workout_id, bw.weight, bw.reps,
+               br.id, br.workout_id, br.reps, br.weight,
+               bv.id, bv.workout_id, bv.volume,
+               COALESCE(c.total_sets, 0), COALESCE(c.total_workouts, 0)
+        FROM Exercises e
+        LEFT JOIN counts c ON c.exercise_id = e.id
+        LEFT JOIN by_weight bw ON bw.exercise_id = e.id AND bw.rn = 1
+        LEFT JOIN by_reps br ON br.exercise_id = e.id AND br.rn = 1
+        LEFT JOIN by_volume bv ON bv.exercise_id = e.id AND bv.rn = 1
+        {exercise_filter}
+    """, params)
+    return conn.total_changes - changes_before
+
+
+def fetch_set_images(conn: sqlite3.Connection, where: str, params: Iterable) -> list[sqlite3.Row]:
+    return conn.execute(f"SELECT {SET_IMAGE_COLUMNS} FROM Sets WHERE {where}", list(params)).fetchall()
+
+
+def _beats(candidate, record: dict, kind: str) -> bool:
+    holder = record[f"max_{kind}_set_id"]
+    if holder is None:
+        return True
+
+    weight, reps = candidate["weight"], candidate["reps"]
+    if kind == "weight":
+        key = (weight, -reps)
+        best = (record["max_weight"], -record["max_weight_reps"])
+    elif kind == "reps":
+        key = (reps, weight)
+        best = (record["max_reps"], record["max_reps_weight"])
+    else:
+        key = (weight * reps,)
+        best = (record["max_volume"],)
+
+    if key != best:
+        return key > best
+    return candidate["id"] < holder
+
+
+# Called after the write: `removed` are the previous images of deleted/edited
+# sets, `inserted` the current images of created/edited sets. Only exercises
+# whose record-holding set was removed get rebuilt, the rest apply deltas.
+def apply_set_changes(conn: sqlite3.Connection, removed: Iterable = (), inserted: Iterable = ()) -> None:
+    removed = list(removed)
+    inserted = list(inserted)
+    if not removed and not inserted:
+        return
+
+    exercise_ids = {s["exercise_id"] for s in removed} | {s["exercise_id"] for s in inserted}
+    placeholders, ids = _in_clause(exercise_ids)
+    conn.executemany(
+        "INSERT OR IGNORE INTO ExerciseRecords (exercise_id) VALUES (?)",
+        [(exercise_id,) for exercise_id in ids]
+    )
+    records = {
+        r["exercise_id"]: dict(r)
+        for r in conn.execute(
+            f"SELECT * FROM ExerciseRecords WHERE exercise_id IN ({placeholders})", ids
+        )
+    }
+
+    to_rebuild = set()
+    for s in removed:
+        record = records[s["exercise_id"]]
+        if s["id"] in (record["max_weight_set_id"], record["max_reps_set_id"], record["max_volume_set_id"]):
+            to_rebuild.add(s["exercise_id"])
+
+    pair_delta: dict[tuple[int, int], int] = {}
+    for s in removed:
+        pair = (s["workout_id"], s["exercise_id"])
+        pair_delta[pair] = pair_delta.get(pair, 0) - 1
+    for s in inserted:
+        pair = (s["workout_id"], s["exercise_id"])
+        pair_delta[pair] = pair_delta.get(pair, 0) + 1
+
+    workout_placeholders, workout_ids = _in_clause({w for w, _ in pair_delta})
+    pair_count = {
+        (r["workout_id"], r["exercise_id"]): r["c"]
+        for r in conn.execute(
+            f"""SELECT workout_id, exercise_id, COUNT(*) as c
+                FROM Sets
+                WHERE workout_id IN ({workout_placeholders})
+                GROUP BY workout_id, exercise_id""",
+            workout_ids
+        )
+    }
+
+    for (workout_id, exercise_id), delta in pair_delta.items():
+        record = records[exercise_id]
+        after = pair_count.get((workout_id, exercise_id), 0)
+        before = after - delta
+        record["total_sets"] += delta
+        record["total_workouts"] += (after > 0) - (before > 0)
+
+    for s in sorted(inserted, key=lambda s: s["id"]):
+        record = records[s["exercise_id"]]
+        if s["exercise_id"] in to_rebuild:
+            continue
+        if _beats(s, record, "weight"):
+            record.update(max_weight_set_id=s["id"], max_weight_workout_id=s["workout_id"],
+                          max_weight=s["weight"], max_weight_reps=s["reps"])
+        if _beats(s, record, "reps"):
+            record.update(max_reps_set_id=s["id"], max_reps_workout_id=s["workout_id"],
+                          max_reps=s["reps"], max_reps_weight=s["weight"])
+        if _beats(s, record, "volume"):
+            record.update(max_volume_set_id=s["id"], max_volume_workout_id=s["workout_id"],
+                          max_volume=s["weight"] * s["reps"])
+
+    conn.executemany(
+        f"""UPDATE ExerciseRecords
+            SET {", ".join(f"{c} = :{c}" for c in _RECORD_COLUMNS)},
+                total_sets = :total_sets, total_workouts = :total_workouts
+            WHERE exercise_id = :exercise_id""",
+        [r for exercise_id, r in records.items() if exercise_id not in to_rebuild]
+    )
+
+    if to_rebuild:
+        rebuild_records(conn, to_rebuild)
@@ -0,0 +1,200 @@
+import sqlite3
+from typing import Iterable, Optional
+
+ROLLUPS_DDL = """
+CREATE TABLE IF NOT EXISTS DailyAggregates (
+    date TEXT NOT NULL,
+    type TEXT NOT NULL,
+    workouts INTEGER NOT NULL,
+    sets INTEGER NOT NULL,
+    volume REAL NOT NULL,
+    exercises INTEGER NOT NULL,
+    PRIMARY KEY (date, type)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_daily_aggregates_type_date ON DailyAggregates(type, date);
+
+CREATE TABLE IF NOT EXISTS DailyExercises (
+    date TEXT NOT NULL,
+    type TEXT NOT NULL,
+    exercise_id INTEGER NOT NULL,
+    sets INTEGER NOT NULL,
+    volume REAL NOT NULL,
+    PRIMARY KEY (date, type, exercise_id)
+) WITHOUT ROWID;
+"""
+
+# Weeks start on Monday: 'weekday 0' moves to the next Sunday (or stays on
+# one), six days back is that week's Monday.
+WEEK_OF = "date({}, 'weekday 0', '-6 days')"
+
+# Every write that can change a week's totals records the week together
+# with the data version it was made at, so memoized weeks can be dropped
+# without rescanning Sets.
+_MARK_WORKOUT_WEEK = f"""
+        INSERT INTO WeekChanges (week, version)
+        SELECT {WEEK_OF.format("w.date")}, v.version
+        FROM Workouts w, DataVersion v
+        WHERE w.id = {{workout_id}} AND {WEEK_OF.format("w.date")} IS NOT NULL
+        ON CONFLICT(week) DO UPDATE SET version = excluded.version;
+"""
+
+_MARK_DATE_WEEK = f"""
+        INSERT INTO WeekChanges (week, version)
+        SELECT {WEEK_OF.format("{date}")}, version FROM DataVersion
+        WHERE {WEEK_OF.format("{date}")} IS NOT NULL
+        ON CONFLICT(week) DO UPDATE SET version = excluded.version;
+"""
+
+WEEK_CHANGES_DDL = f"""
+CREATE TABLE IF NOT EXISTS WeekChanges (
+    week TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS trg_sets_insert_week
+AFTER INSERT ON Sets
+BEGIN
+{_MARK_WORKOUT_WEEK.format(workout_id="NEW.workout_id")}
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_sets_update_week
+AFTER UPDATE OF workout_id, exercise_id, weight, reps ON Sets
+WHEN OLD.workout_id IS NOT NEW.workout_id OR OLD.exercise_id IS NOT NEW.exercise_id
+  OR OLD.weight IS NOT NEW.weight OR OLD.reps IS NOT NEW.reps
+BEGIN
+{_MARK_WORKOUT_WEEK.format(workout_id="OLD.workout_id")}
+{_MARK_WORKOUT_WEEK.format(workout_id="NEW.workout_id")}
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_sets_delete_week
+AFTER DELETE ON Sets
+BEGIN
+{_MARK_WORKOUT_WEEK.format(workout_id="OLD.workout_id")}
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_workouts_date_week
+AFTER UPDATE OF date ON Workouts
+WHEN OLD.date IS NOT NEW.date
+BEGIN
+{_MARK_DATE_WEEK.format(date="OLD.date")}
+{_MARK_DATE_WEEK.format(date="NEW.date")}
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_workouts_delete_week
+AFTER DELETE ON Workouts
+BEGIN
+{_MARK_DATE_WEEK.format(date="OLD.date")}
+END;
+"""
+
+_AGGREGATE_SELECT = """
+    SELECT w.date, w.type,
+           COUNT(DISTINCT w.id) as workouts,
+           COUNT(s.id) as sets,
+           COALESCE(SUM(s.weight * s.reps), 0) as volume,
+           COUNT(DISTINCT s.exercise_id) as exercises
+    FROM Workouts w
+    LEFT JOIN Sets s ON s.workout_id = w.id
+    {where}
+    GROUP BY w.date, w.type
+"""
+
+_EXERCISE_SELECT = """
+    SELECT w.date, w.type, s.exercise_id,
+           COUNT(*) as sets,
+           SUM(s.weight * s.reps) as volume
+    FROM Workouts w
+    JOIN Sets s ON s.workout_id = w.id
+    {where}
+    GROUP BY w.date, w.type, s.exercise_id
+"""
+
+
+def workout_days(conn: sqlite3.Connection, workout_ids: Iterable[int]) -> set[tuple[str, str]]:
+    ids = list(workout_ids)
+    if not ids:
+        return set()
+    return {
+        (r["date"], r["type"])
+        for r in conn.execute(
+            f"SELECT DISTINCT date, type FROM Workouts WHERE id IN ({', '.join('?' for _ in ids)})",
+            ids
+        )
+    }
+
+
+# Recomputes the given (date, type) buckets from raw rows, so the cost of a
+# write is bounded by the size of the days it touched.
+def refresh_daily_aggregates(conn: sqlite3.Connection, days: Iterable[tuple[str, str]]) -> None:
+    days = list(set(days))
+    if not days:
+        return
+
+    values = ", ".join("(?, ?)" for _ in days)
+    params = [v for day in days for v in day]
+    conn.execute(f"DELETE FROM DailyAggregates WHERE (date, type) IN (VALUES {values})", params)
+    conn.execute(f"DELETE FROM DailyExercises WHERE (date, type) IN (VALUES {values})", params)
+
+    where = f"WHERE (w.date, w.type) IN (VALUES {values})"
+    conn.execute(f"INSERT INTO DailyAggregates {_AGGREGATE_SELECT.format(where=where)}", params)
+    conn.execute(f"INSERT INTO DailyExercises {_EXERCISE_SELECT.format(where=where)}", params)
+
+
+def rebuild_daily_aggregates(conn: sqlite3.Connection) -> None:
+    conn.execute("DELETE FROM DailyAggregates")
+    conn.execute("DELETE FROM DailyExercises")
+    conn.execute(f"INSERT INTO DailyAggregates {_AGGREGATE_SELECT.format(where='')}")
+    conn.execute(f"INSERT INTO DailyExercises {_EXERCISE_SELECT.format(where='')}")
+
+
+def check_daily_aggregates(conn: sqlite3.Connection) -> list[tuple[str, str]]:
+    rows = conn.execute(f"""
+        WITH raw AS ({_AGGREGATE_SELECT.format(where='')}),
+        expected AS (SELECT date, type, workouts, sets, ROUND(volume, 6), exercises FROM raw),
+        stored AS (SELECT date, type, workouts, sets, ROUND(volume, 6), exercises FROM DailyAggregates),
+        diff AS (
+            SELECT * FROM (SELECT * FROM expected EXCEPT SELECT * FROM stored)
+            UNION
+            SELECT * FROM (SELECT * FROM stored EXCEPT SELECT * FROM expected)
+        )
+        SELECT DISTINCT date, type FROM diff ORDER BY date, type
+    """).fetchall()
+    return [(r["date"], r["type"]) for r in rows]
+
+
+def summarize(
+    conn: sqlite3.Connection,
+    type: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None
+) -> dict:
+    where = "WHERE 1=1"
+    params = []
+
+    if type:
+        where += " AND type = ?"
+        params.append(type)
+
+    if date_from:
+        where += " AND date >= ?"
+        params.append(date_from)
+
+    if date_to:
+        where += " AND date <= ?"
+        params.append(date_to)
+
+    # Scanning the exercise-ordered index counts distinct exercises as they
+    # pass; a date range would otherwise seek the primary key and
+    # de-duplicate through a temp B-tree.
+    row = conn.execute(f"""
+        SELECT COALESCE(SUM(workouts), 0) as total_workouts,
+               COALESCE(SUM(sets), 0) as total_sets,
+               COALESCE(SUM(volume), 0) as total_volume,
+               (SELECT COUNT(DISTINCT exercise_id)
+                FROM DailyExercises INDEXED BY idx_daily_exercises_exercise
+                {where}) as total_unique_exercises
+        FROM DailyAggregates
+        {where}
+    """, params + params).fetchone()
+    return dict(row)
@@ -0,0 +1,183 @@
+import re
+import sqlite3
+from typing import Optional
+
+SEARCH_SOURCES = ("workout", "exercise", "template")
+
+# External-content FTS5 indexes over the note columns: the text lives only
+# in the base tables and the triggers below keep each index in step.
+_NOTE_TABLES = {
+    "workout": ("Workouts", "WorkoutNotesFts"),
+    "exercise": ("Exercises", "ExerciseNotesFts"),
+    "template": ("Templates", "TemplateNotesFts"),
+}
+
+_NOTE_FTS_DDL = """
+CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+    note,
+    content='{table}',
+    content_rowid='id',
+    tokenize='porter unicode61 remove_diacritics 2'
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_{fts}_insert
+AFTER INSERT ON {table}
+BEGIN
+    INSERT INTO {fts} (rowid, note) VALUES (NEW.id, NEW.note);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_{fts}_delete
+AFTER DELETE ON {table}
+BEGIN
+    INSERT INTO {fts} ({fts}, rowid, note) VALUES ('delete', OLD.id, OLD.note);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_{fts}_update
+AFTER UPDATE OF note ON {table}
+WHEN OLD.note IS NOT NEW.note
+BEGIN
+    INSERT INTO {fts} ({fts}, rowid, note) VALUES ('delete', OLD.id, OLD.note);
+    INSERT INTO {fts} (rowid, note) VALUES (NEW.id, NEW.note);
+END;
+
+INSERT INTO {fts} ({fts}) VALUES ('rebuild');
+"""
+
+SEARCH_DDL = "".join(_NOTE_FTS_DDL.format(table=table, fts=fts) for table, fts in _NOTE_TABLES.values())
+
+_SOURCE_COLUMNS = {
+    "workout": ("w", "NULL as name, w.date, w.type"),
+    "exercise": ("e", "e.name, NULL as date, e.muscle_group as type"),
+    "template": ("t", "t.name, NULL as date, t.type"),
+}
+
+# Without filters the index ranks on its own and the base table is only
+# read for the final page. bm25() is called directly: ordering by FTS5's
+# rank column measured slower here.
+_INDEX_RANKED_SELECT = """
+    SELECT rowid as id, bm25({fts}) as rank
+    FROM {fts}
+    WHERE {fts} MATCH ?
+    ORDER BY rank
+    LIMIT ?
+"""
+
+_RANKED_SELECT = """
+    SELECT {fts}.rowid as id, bm25({fts}) as rank
+    FROM {fts}
+    JOIN {table} {alias} ON {alias}.id = {fts}.rowid
+    WHERE {fts} MATCH ? {where}
+    ORDER BY rank
+    LIMIT ?
+"""
+
+# bm25() costs the same for every match, so a word found in most notes of a
+# very large log takes tens of milliseconds to rank. A window ranks only the
+# newest matches, which the index yields in rowid order without a sort, at
+# the price of never returning older notes however relevant.
+_WINDOWED_SELECT = """
+    SELECT id, rank FROM (
+        SELECT {fts}.rowid as id, bm25({fts}) as rank
+        FROM {fts}
+        JOIN {table} {alias} ON {alias}.id = {fts}.rowid
+        WHERE {fts} MATCH ? {where}
+        ORDER BY {fts}.rowid DESC
+        LIMIT ?
+    )
+    ORDER BY rank
+    LIMIT ?
+"""
+
+# Highlighting re-tokenizes the note, so it only runs for the final page.
+_RESULT_SELECT = """
+    SELECT {alias}.id, {columns}, {alias}.note,
+           highlight({fts}, 0, '<mark>', '</mark>') as highlight
+    FROM {fts}
+    JOIN {table} {alias} ON {alias}.id = {fts}.rowid
+    WHERE {fts} MATCH ? AND {fts}.rowid IN ({ids})
+"""
+
+
+def optimize_search_indexes(conn: sqlite3.Connection, sources: tuple[str, ...] = SEARCH_SOURCES) -> None:
+    # Each write transaction adds an index segment and every query seeks all
+    # of them; merging back to one segment after bulk loads keeps lookups flat.
+    for source in sources:
+        _, fts = _NOTE_TABLES[source]
+        conn.execute(f"INSERT INTO {fts} ({fts}) VALUES ('optimize')")
+
+
+def match_expression(text: str) -> Optional[str]:
+    # Free text becomes quoted terms that must all match, so FTS5 operators
+    # and punctuation in the input cannot break the query. No prefix terms:
+    # FTS5 merges every matching term's doclist up front, which costs more
+    # than the whole ranked query; the porter stemmer covers word forms.
+    terms = re.findall(r"\w+", text)
+    if not terms:
+        return None
+    return " ".join(f'"{term}"' for term in terms)
+
+
+def search_notes(
+    conn: sqlite3.Connection,
+    text: str,
+    sources: tuple[str, ...] = SEARCH_SOURCES,
+    type: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    limit: int = 20,
+    window: Optional[int] = None
+) -> list[dict]:
+    expression = match_expression(text)
+    if expression is None:
+        return []
+
+    # Exercises have no type and templates no date, so those filters narrow
+    # the sources as well as the rows.
+    if type:
+        sources = tuple(s for s in sources if s != "exercise")
+    if date_from or date_to:
+        sources = tuple(s for s in sources if s == "workout")
+
+    ranked = []
+    for source in sources:
+        table, fts = _NOTE_TABLES[source]
+        alias, _ = _SOURCE_COLUMNS[source]
+        where = ""
+        params: list = [expression]
+        if type:
+            where += f" AND {alias}.type = ?"
+            params.append(type)
+        if date_from:
+            where += f" AND {alias}.date >= ?"
+            params.append(date_from)
+        if date_to:
+            where += f" AND {alias}.date <= ?"
+            params.append(date_to)
+        if window:
+            params.append(window)
+        params.append(limit)
+        if window:
+            select = _WINDOWED_SELECT
+        else:
+            select = _RANKED_SELECT if where else _INDEX_RANKED_SELECT
+        sql = select.format(fts=fts, table=table, alias=alias, where=where)
+        ranked.extend((r["rank"], source, r["id"]) for r in conn.execute(sql, params))
+
+    # bm25() is lower-is-better; scores from the three indexes are merged as is.
+    ranked.sort()
+    ranked = ranked[:limit]
+
+    rows = {}
+    for source in {source for _, source, _ in ranked}:
+        table, fts = _NOTE_TABLES[source]
+        alias, columns = _SOURCE_COLUMNS[source]
+        ids = [id for _, s, id in ranked if s == source]
+        sql = _RESULT_SELECT.format(fts=fts, table=table, alias=alias, columns=columns, ids=", ".join("?" for _ in ids))
+        for r in conn.execute(sql, [expression, *ids]):
+            rows[source, r["id"]] = dict(r)
+
+    return [
+        {"kind": source, **rows[source, id], "rank": rank}
+        for rank, source, id in ranked
+        if (source, id) in rows
+    ]
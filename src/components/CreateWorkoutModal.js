@@ -2,7 +2,7 @@ import React, { useState } from 'react';
 import AddExerciseModal from './AddExerciseModal';
 import TemplatesModal from './TemplatesModal';
 import ErrorAlert from './ErrorAlert';
-import { createSet, createWorkout } from '../utils/api';
+import { createWorkoutFull } from '../utils/api';
 import '../styles/components/CreateWorkoutModal.css';
 
 const CreateWorkoutModal = ({ isOpen, onClose, onSave }) => {
@@ -34,16 +34,8 @@ const CreateWorkoutModal = ({ isOpen, onClose, onSave }) => {
 
     try {
       const today = new Date().toISOString().split('T')[0];
-      const created = await createWorkout({
-        date: today,
-        type: workoutType || 'Workout',
-        note: workoutNotes.trim() || null,
-      });
 
-      const workoutId = created?.id;
-      if (!workoutId) throw new Error('Backend did not return workout id');
-
-      const setCreates = [];
+      const sets = [];
       for (const ex of exercises) {
         if (!ex.exerciseId) {
           throw new Error(`Missing exerciseId for "${ex.exercise}" (reload exercises list and try again)`);
@@ -53,16 +45,24 @@ const CreateWorkoutModal = ({ isOpen, onClose, onSave }) => {
           : [{ setNumber: 1, weight: ex.weight, reps: ex.reps }];
 
         for (const s of series) {
-          setCreates.push(createSet({
-            workout_id: workoutId,
+          sets.push({
             exercise_id: ex.exerciseId,
             weight: Number(s.weight),
             reps: Number(s.reps),
             set_number: s.setNumber || null,
-          }));
+          });
         }
       }
-      await Promise.all(setCreates);
+
+      const created = await createWorkoutFull({
+        date: today,
+        type: workoutType || 'Workout',
+        note: workoutNotes.trim() || null,
+        sets,
+      });
+
+      const workoutId = created?.id;
+      if (!workoutId) throw new Error('Backend did not return workout id');
 
       if (onSave) onSave({ id: workoutId });
 
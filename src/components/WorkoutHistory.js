@@ -1,78 +1,117 @@
-import React, { useState, useEffect, useImperativeHandle, forwardRef } from 'react';
+import React, { useState, useEffect, useRef, useImperativeHandle, forwardRef } from 'react';
 import WorkoutDetailsModal from './WorkoutDetailsModal';
 import { deleteWorkout, getWorkoutsHistory } from '../utils/api';
 import '../styles/components/WorkoutHistory.css';
 
+const PAGE_SIZE = 50;
+
 const WorkoutHistory = forwardRef((props, ref) => {
   const [workouts, setWorkouts] = useState([]);
   const [selectedWorkout, setSelectedWorkout] = useState(null);
   const [showDetails, setShowDetails] = useState(false);
   const [showDeleteConfirm, setShowDeleteConfirm] = useState(false);
   const [workoutToDelete, setWorkoutToDelete] = useState(null);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const sentinelRef = useRef(null);
 
   useEffect(() => {
     loadWorkouts();
   }, []);
 
-  const loadWorkouts = async () => {
-    try {
-      const data = await getWorkoutsHistory({ limit: 50, includeStats: false });
-
-      const list = (data?.workouts || []).map((w) => {
-        const hasSets = Array.isArray(w.sets) && w.sets.length > 0;
-
-        const exercisesCount =
-          (w.statistics && typeof w.statistics.exercises_count === 'number'
-            ? w.statistics.exercises_count
-            : typeof w.exercises_count === 'number'
-            ? w.exercises_count
-            : 0);
-
-        const base = {
-          id: w.id,
-          date: w.date,
-          name: w.type || w.template_name || 'Workout',
-          note: w.note,
-          exercises: exercisesCount,
-        };
-
-        if (!hasSets) {
-          return { ...base, exercisesList: [] };
+  const fetchPage = async (cursor) => {
+    const data = await getWorkoutsHistory({ limit: PAGE_SIZE, includeStats: false, cursor });
+
+    const list = (data?.workouts || []).map((w) => {
+      const hasSets = Array.isArray(w.sets) && w.sets.length > 0;
+
+      const exercisesCount =
+        (w.statistics && typeof w.statistics.exercises_count === 'number'
+          ? w.statistics.exercises_count
+          : typeof w.exercises_count === 'number'
+          ? w.exercises_count
+          : 0);
+
+      const base = {
+        id: w.id,
+        date: w.date,
+        name: w.type || w.template_name || 'Workout',
+        note: w.note,
+        exercises: exercisesCount,
+      };
+
+      if (!hasSets) {
+        return { ...base, exercisesList: [] };
+      }
+
+      const exercisesMap = (w.sets || []).reduce((acc, s) => {
+        const key = String(s.exercise_id);
+        if (!acc[key]) {
+          acc[key] = {
+            id: s.exercise_id,
+            exerciseId: s.exercise_id,
+            exercise: s.exercise_name,
+            muscleGroup: s.muscle_group,
+            series: [],
+            sets: 0,
+            weight: s.weight,
+            reps: s.reps,
+            notes: '',
+          };
         }
+        acc[key].series.push({ setNumber: s.set_number, weight: s.weight, reps: s.reps });
+        acc[key].sets = acc[key].series.length;
+        return acc;
+      }, {});
+
+      return {
+        ...base,
+        exercisesList: Object.values(exercisesMap),
+      };
+    });
+
+    return { list, nextCursor: data?.nextCursor || null };
+  };
 
-        const exercisesMap = (w.sets || []).reduce((acc, s) => {
-          const key = String(s.exercise_id);
-          if (!acc[key]) {
-            acc[key] = {
-              id: s.exercise_id,
-              exerciseId: s.exercise_id,
-              exercise: s.exercise_name,
-              muscleGroup: s.muscle_group,
-              series: [],
-              sets: 0,
-              weight: s.weight,
-              reps: s.reps,
-              notes: '',
-            };
-          }
-          acc[key].series.push({ setNumber: s.set_number, weight: s.weight, reps: s.reps });
-          acc[key].sets = acc[key].series.length;
-          return acc;
-        }, {});
-
-        return {
-          ...base,
-          exercisesList: Object.values(exercisesMap),
-        };
-      });
-
-      setWorkouts(list);
+  const loadWorkouts = async () => {
+    try {
+      const page = await fetchPage();
+      setWorkouts(page.list);
+      setNextCursor(page.nextCursor);
     } catch (e) {
       console.error('Failed to load workouts history:', e);
       setWorkouts([]);
+      setNextCursor(null);
     }
   };
 
+  const loadMore = async () => {
+    if (!nextCursor || loadingMore) return;
+    setLoadingMore(true);
+    try {
+      const page = await fetchPage(nextCursor);
+      setWorkouts((prev) => [...prev, ...page.list]);
+      setNextCursor(page.nextCursor);
+    } catch (e) {
+      console.error('Failed to load more workouts:', e);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  useEffect(() => {
+    const node = sentinelRef.current;
+    if (!node || !nextCursor) return undefined;
+
+    const observer = new IntersectionObserver((entries) => {
+      if (entries.some((entry) => entry.isIntersecting)) {
+        loadMore();
+      }
+    });
+    observer.observe(node);
+    return () => observer.disconnect();
+  }, [nextCursor, loadingMore]);
+
   useImperativeHandle(ref, () => ({
     reload: loadWorkouts
   }));
@@ -153,6 +192,7 @@ const WorkoutHistory = forwardRef((props, ref) => {
                 </button>
               </li>
             ))}
+            {nextCursor && <li ref={sentinelRef} className="workout-list-sentinel" aria-hidden="true" />}
           </ul>
         )}
       </div>
@@ -46,6 +46,13 @@ export function createWorkout(payload) {
   });
 }
 
+export function createWorkoutFull(payload) {
+  return apiFetch('/workouts/full', {
+    method: 'POST',
+    body: JSON.stringify(payload),
+  });
+}
+
 export function createSet(payload) {
   return apiFetch('/sets', {
     method: 'POST',
@@ -53,25 +60,33 @@ export function createSet(payload) {
   });
 }
 
+export function createSetsBatch(workoutId, sets) {
+  return apiFetch(`/workouts/${workoutId}/sets/batch`, {
+    method: 'POST',
+    body: JSON.stringify(sets),
+  });
+}
+
 export function deleteWorkout(workoutId) {
   return apiFetch(`/workouts/${workoutId}`, { method: 'DELETE' });
 }
 
-export async function getWorkoutsHistory({ limit = 50, includeStats = true } = {}) {
+export async function getWorkoutsHistory({ limit = 50, includeStats = true, cursor } = {}) {
   const qs = new URLSearchParams();
   if (limit) qs.set('limit', String(limit));
+  if (cursor) qs.set('cursor', cursor);
   qs.set('include_stats', includeStats ? 'true' : 'false');
   const data = await apiFetch(`/workouts/history?${qs.toString()}`);
 
   if (Array.isArray(data)) {
-    return { workouts: data };
+    return { workouts: data, nextCursor: null };
   }
 
   if (data && Array.isArray(data.workouts)) {
-    return data;
+    return { ...data, nextCursor: data.next_cursor || null };
   }
 
-  return { workouts: [] };
+  return { workouts: [], nextCursor: null };
 }
 
 export function getWorkout(workoutId) {